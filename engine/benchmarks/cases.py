@@ -0,0 +1,200 @@
+"""
+Benchmark Cases
+Engine hot paths exercised by the benchmark runner. Each case is a
+zero-argument callable built once from fixed, seeded inputs.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+from src.features.engineering import FeatureEngineer
+from src.models.backtest import Backtester, evaluate_weights, weight_grid
+from src.models.dixon_coles import DixonColesModel
+from src.models.ensemble import PredictionEngine
+from src.models.inplay import InPlayMatch
+from src.models.score_matrix import ScoreMatrix
+
+BATCH_SIZE = 1000
+LEAGUE_TEAMS = 20
+LEAGUE_SEASONS = 5
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+
+# Form / xG combinations spanning realistic goal expectations
+LAMBDA_RANGES = {
+    "low": {"home_form": "LDL", "away_form": "DLL", "home_xg": 0.6, "away_xg": 0.5},
+    "mid": {"home_form": "WDW", "away_form": "DWL", "home_xg": 1.5, "away_xg": 1.2},
+    "high": {"home_form": "WWWWW", "away_form": "WWW", "home_xg": 3.5, "away_xg": 2.8},
+}
+
+
+def _match(overrides: dict) -> dict:
+    match = {
+        "home_team_id": 1,
+        "away_team_id": 2,
+        "home_possession": 55,
+        "away_possession": 45,
+        "home_defensive_rating": 0.75,
+        "away_defensive_rating": 0.7,
+        "is_home_advantage": True,
+    }
+    match.update(overrides)
+    return match
+
+
+def _batch(size: int, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    forms = ["WWW", "WDL", "LLD", "WWDWW", "DDD", "LWLWL"]
+    return [
+        _match(
+            {
+                "home_form": forms[rng.integers(len(forms))],
+                "away_form": forms[rng.integers(len(forms))],
+                "home_xg": float(rng.uniform(0.3, 3.5)),
+                "away_xg": float(rng.uniform(0.3, 3.0)),
+            }
+        )
+        for _ in range(size)
+    ]
+
+
+def _feature_match() -> dict:
+    team = {
+        "recent_results": ["W", "D", "W", "L", "W"],
+        "points_last_5": 10,
+        "points_last_10": 18,
+        "points_last_20": 34,
+        "home_record": {"wins": 7, "played": 12},
+        "xg_avg": 1.6,
+        "clean_sheets": 5,
+        "goals_conceded": 14,
+        "matches_played": 20,
+        "days_since_last_match": 4,
+        "matches_in_14_days": 3,
+        "squad_depth": 24,
+        "key_players_out": 2,
+        "previous_results": [{"result": "W"}],
+        "weather_affinity": {"wind_resistance": 0.4, "rain_affinity": 0.2},
+    }
+    return {
+        "home_team": dict(team, id=1),
+        "away_team": dict(team, id=2),
+        "competition_stage": "mid",
+        "weather": {"wind_speed": 12, "rain_probability": 0.3, "temperature": 9},
+        "referee_id": "ref-1",
+    }
+
+
+def _feature_columns(size: int, seed: int = 11) -> dict:
+    rng = np.random.default_rng(seed)
+    results = np.array(["WDWLW", "LLDWW", "WWWWW", "DDLDL", "WLW"])
+    return {
+        "home_recent_results": results[rng.integers(len(results), size=size)],
+        "away_recent_results": results[rng.integers(len(results), size=size)],
+        "home_points_last_5": rng.integers(0, 16, size),
+        "away_points_last_5": rng.integers(0, 16, size),
+        "home_points_last_20": rng.integers(0, 61, size),
+        "away_points_last_20": rng.integers(0, 61, size),
+        "home_xg_avg": rng.uniform(0.5, 2.5, size),
+        "away_xg_avg": rng.uniform(0.5, 2.5, size),
+        "home_matches_played": rng.integers(1, 38, size),
+        "away_matches_played": rng.integers(1, 38, size),
+        "competition_stage": np.array(["early", "mid", "late"])[rng.integers(3, size=size)],
+        "referee_known": rng.random(size) < 0.8,
+        "referee_home_wins": rng.integers(0, 40, size),
+        "referee_away_wins": rng.integers(0, 30, size),
+        "referee_total_matches": rng.integers(40, 100, size),
+        "referee_yellow_cards": rng.integers(100, 400, size),
+    }
+
+
+def _league_history(seed: int = 3) -> dict:
+    """Double round-robin results for LEAGUE_SEASONS seasons, newest season last"""
+    rng = np.random.default_rng(seed)
+    home, away = np.nonzero(~np.eye(LEAGUE_TEAMS, dtype=bool))
+    attack = rng.normal(0, 0.3, LEAGUE_TEAMS)
+    defence = rng.normal(0, 0.2, LEAGUE_TEAMS)
+    home = np.tile(home, LEAGUE_SEASONS)
+    away = np.tile(away, LEAGUE_SEASONS)
+    season = np.repeat(np.arange(LEAGUE_SEASONS), LEAGUE_TEAMS * (LEAGUE_TEAMS - 1))
+    return {
+        "home_team_ids": home,
+        "away_team_ids": away,
+        "home_goals": rng.poisson(np.exp(0.35 + attack[home] + defence[away])),
+        "away_goals": rng.poisson(np.exp(0.1 + attack[away] + defence[home])),
+        "days_ago": (LEAGUE_SEASONS - 1 - season) * 365 + rng.integers(0, 300, season.size),
+    }
+
+
+def _cold_start():
+    """Import the service in a fresh interpreter, as a serverless cold start does"""
+    subprocess.run([sys.executable, "-c", "import src.main"], cwd=ENGINE_DIR, check=True)
+
+
+def _play_match(live: InPlayMatch):
+    """Every minute of a match in order: the same updates on every call, none repeating the last"""
+    for minute in range(90):
+        live.update(float(minute), 1, 0)
+
+
+def build_cases() -> dict:
+    """Benchmark name -> zero-argument callable"""
+    engine = PredictionEngine()
+    cases = {}
+
+    for name, overrides in LAMBDA_RANGES.items():
+        match = _match(overrides)
+        cases[f"predict_match[{name}]"] = lambda match=match: engine.predict_match(match)
+        cases[f"predict_full[{name}]"] = lambda match=match: engine.predict_full(match)
+        cases[f"predict_tiered[{name},fast]"] = lambda match=match: engine.predict_tiered(match, "fast")
+        cases[f"sensitivity[{name}]"] = lambda match=match: engine.sensitivity(match)
+        cases[f"generate_scorelines[{name}]"] = (
+            lambda match=match: engine.generate_scorelines(engine.engineer_features(match))
+        )
+        cases[f"goal_markets[{name}]"] = (
+            lambda match=match: engine.goal_markets(engine.engineer_features(match))
+        )
+
+    batch = _batch(BATCH_SIZE)
+    cases[f"predict_batch[{BATCH_SIZE}]"] = lambda: engine.predict_batch(batch)
+    cases[f"predict_batch[{BATCH_SIZE},auto]"] = lambda: engine.predict_batch(batch, "auto")
+    cases[f"predict_full_batch[{BATCH_SIZE}]"] = lambda: engine.predict_full_batch(batch)
+
+    home_lambda, away_lambda = np.random.default_rng(3).uniform(0.2, 4.0, (2, BATCH_SIZE))
+    cases[f"score_matrix[{BATCH_SIZE}]"] = lambda: ScoreMatrix(home_lambda, away_lambda)
+
+    feature_match = _feature_match()
+    historical = {
+        "referee_data": {
+            "ref-1": {"home_wins": 30, "away_wins": 18, "total_matches": 70, "yellow_cards": 260}
+        }
+    }
+    cases["engineer_match_features"] = (
+        lambda: FeatureEngineer.engineer_match_features(feature_match, historical)
+    )
+    columns = _feature_columns(BATCH_SIZE)
+    cases[f"engineer_match_features_batch[{BATCH_SIZE}]"] = (
+        lambda: FeatureEngineer.engineer_match_features_batch(columns)
+    )
+
+    rng = np.random.default_rng(5)
+    backtester = Backtester(
+        engine, batch, rng.poisson(1.5, BATCH_SIZE), rng.poisson(1.2, BATCH_SIZE)
+    )
+    grid = weight_grid(len(backtester.models), 0.1)
+    cases[f"backtest_weights[{len(grid)}x{BATCH_SIZE}]"] = (
+        lambda: evaluate_weights(grid, backtester.probabilities, backtester.outcomes)
+    )
+
+    history = _league_history()
+    cases[f"dixon_coles_fit[{LEAGUE_SEASONS}_seasons]"] = (
+        lambda: DixonColesModel().fit(**history, warm_start=False)
+    )
+
+    live = InPlayMatch("benchmark", 1.6, 1.1)
+    cases["inplay_update[90_minutes]"] = lambda: _play_match(live)
+
+    cases["cold_start[import src.main]"] = _cold_start
+
+    return cases
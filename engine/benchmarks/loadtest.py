@@ -0,0 +1,332 @@
+"""
+End-to-end load test with a saturation report
+
+Run from the engine directory:
+
+    python -m benchmarks.loadtest                                  # in-process, default mix
+    python -m benchmarks.loadtest --transport uvicorn              # over a local uvicorn
+    python -m benchmarks.loadtest --mix predict=6,analyze=3,sensitivity=1 \\
+        --concurrency 1,4,16,64 --duration 15 --json report.json
+
+The app from src.main runs with its real lifespan, except that Redis is
+replaced by an in-memory stand-in, so no server is needed. Each concurrency
+step runs that many closed-loop clients for --duration seconds. Every client
+sends requests drawn from the mix over a pool of --matches distinct fixtures;
+the pool size sets the cache hit ratio, and the stand-in is emptied before
+every step so each one starts from a cold cache. For each step the report gives
+throughput, p50/p95/p99 latency and the error rate. The knee is the lowest
+concurrency that reaches KNEE_FRACTION of peak throughput: beyond it, more
+concurrent clients only add latency.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import numpy as np
+from src.lib import redis_client
+
+# Request kinds: (path, query parameters)
+REQUEST_KINDS = {
+    "predict": ("/predictions/predict", {}),
+    "predict_fast": ("/predictions/predict", {"tier": "fast"}),
+    "predict_auto": ("/predictions/predict", {"tier": "auto"}),
+    "analyze": ("/predictions/analyze", {}),
+    "sensitivity": ("/predictions/analyze", {"sensitivity": "true"}),
+}
+DEFAULT_MIX = "predict=8,analyze=2"
+DEFAULT_CONCURRENCY = "1,2,4,8,16,32,64"
+KNEE_FRACTION = 0.9
+UVICORN_PORT = 8799
+FORMS = ("W", "D", "L")
+
+
+class MemoryRedis:
+    """
+    In-memory stand-in for the redis.asyncio client
+    Covers the commands the engine issues: GET, SET with expiry and NX
+    (the precompute lock), MGET, LPUSH/LTRIM/LRANGE (the profile index),
+    PUBLISH and non-transactional pipelines. There is no pub/sub, which is
+    why the in-play routes are not among REQUEST_KINDS.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+
+    def _alive(self, key) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+
+    async def get(self, key):
+        return self._data[key] if self._alive(key) else None
+
+    async def mget(self, keys):
+        return [self._data[key] if self._alive(key) else None for key in keys]
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._alive(key):
+            return None
+        self._data[key] = value.decode() if isinstance(value, bytes) else value
+        if ex is None and px is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = time.monotonic() + (ex if ex is not None else px / 1000)
+        return True
+
+    async def lpush(self, key, *values):
+        items = self._data[key] if self._alive(key) else []
+        # Like LPUSH, each value goes to the head in turn, so the last ends up first
+        self._data[key] = [str(value) for value in reversed(values)] + items
+        return len(self._data[key])
+
+    async def lrange(self, key, start, stop):
+        # Redis ranges include stop; -1 means the last element
+        return list(self._data[key][start:stop + 1 or None]) if self._alive(key) else []
+
+    async def ltrim(self, key, start, stop):
+        if self._alive(key):
+            self._data[key] = self._data[key][start:stop + 1 or None]
+        return True
+
+    async def flushall(self):
+        self._data.clear()
+        self._expires.clear()
+        return True
+
+    async def delete(self, *keys):
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def publish(self, channel, message):
+        return 0
+
+    def pipeline(self, transaction: bool = True):
+        return MemoryPipeline(self)
+
+    async def close(self):
+        self._data.clear()
+        self._expires.clear()
+
+
+class MemoryPipeline:
+    """Buffers commands and runs them in order on execute()"""
+
+    def __init__(self, client: MemoryRedis):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await getattr(self.client, command)(*args, **kwargs) for command, args, kwargs in commands]
+
+
+def parse_mix(text: str) -> dict:
+    """'predict=8,analyze=2' -> normalized request-kind weights"""
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind '{kind}', expected one of {tuple(REQUEST_KINDS)}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def fixture_pool(size: int, seed: int = 13) -> list:
+    """Distinct MatchInput payloads; half send form strings, half use server-side team state"""
+    rng = random.Random(seed)
+    pool = []
+    for i in range(size):
+        match = {
+            "home_team_id": 2 * i,
+            "away_team_id": 2 * i + 1,
+            "home_xg": round(rng.uniform(0.6, 2.8), 2),
+            "away_xg": round(rng.uniform(0.5, 2.4), 2),
+            "home_possession": round(rng.uniform(35, 65), 1),
+        }
+        match["away_possession"] = round(100 - match["home_possession"], 1)
+        if i % 2 == 0:
+            match["home_form"] = "".join(rng.choices(FORMS, k=5))
+            match["away_form"] = "".join(rng.choices(FORMS, k=5))
+        pool.append(match)
+    return pool
+
+
+def percentiles(latencies: list) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, (50, 95, 99))
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+async def run_step(client: httpx.AsyncClient, concurrency: int, duration: float, mix: dict, pool: list, seed: int) -> dict:
+    """Closed-loop traffic from concurrency clients for duration seconds"""
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(index: int):
+        rng = random.Random(seed * 1_000_003 + index)
+        while time.perf_counter() < deadline:
+            path, params = REQUEST_KINDS[rng.choices(kinds, weights)[0]]
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, params=params, json=rng.choice(pool))
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    requests = len(latencies)
+    errors = requests - sum(count for status, count in statuses.items() if 200 <= status < 300)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_rps": requests / elapsed,
+        **percentiles(latencies),
+        "error_rate": errors / requests if requests else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def find_knee(steps: list) -> int:
+    """Lowest concurrency reaching KNEE_FRACTION of the peak throughput"""
+    peak = max(step["throughput_rps"] for step in steps)
+    for step in steps:
+        if step["throughput_rps"] >= KNEE_FRACTION * peak:
+            return step["concurrency"]
+    return steps[-1]["concurrency"]
+
+
+def install_memory_redis():
+    """Point the app's Redis client at a MemoryRedis, including reconnects from the lifespan"""
+    import src.main
+
+    async def init_memory_redis():
+        redis_client.redis_client = MemoryRedis()
+
+    src.main.init_redis = init_memory_redis
+    return src.main.app
+
+
+@asynccontextmanager
+async def in_process_client(app):
+    """httpx client calling the ASGI app directly, with its lifespan running"""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(app, port: int):
+    """httpx client against the app served by uvicorn on a background thread"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"uvicorn failed to start on port {port}")
+        await asyncio.sleep(0.05)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    pool = fixture_pool(args.matches)
+    app = install_memory_redis()
+    # One log line per request would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    connect = in_process_client(app) if args.transport == "inprocess" else uvicorn_client(app, args.port)
+
+    steps = []
+    async with connect as client:
+        if args.warmup > 0:
+            await run_step(client, 1, args.warmup, mix, pool, seed=0)
+        print(f"{'concurrency':>12}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+        for level in levels:
+            await redis_client.get_redis().flushall()
+            step = await run_step(client, level, args.duration, mix, pool, seed=level)
+            steps.append(step)
+            print(
+                f"{level:>12}{step['requests']:>10}{step['throughput_rps']:>10,.1f}"
+                f"{step['p50_ms']:>10.2f}{step['p95_ms']:>10.2f}{step['p99_ms']:>10.2f}"
+                f"{step['error_rate']:>9.1%}"
+            )
+
+    knee = find_knee(steps)
+    peak = max(steps, key=lambda step: step["throughput_rps"])
+    print(
+        f"\nPeak {peak['throughput_rps']:,.1f} req/s at concurrency {peak['concurrency']}; "
+        f"knee at concurrency {knee} (first step within {KNEE_FRACTION:.0%} of peak)"
+    )
+    return {
+        "transport": args.transport,
+        "mix": mix,
+        "duration_seconds": args.duration,
+        "matches": args.matches,
+        "steps": steps,
+        "peak_throughput_rps": peak["throughput_rps"],
+        "knee_concurrency": knee,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Predictsports engine load test")
+    parser.add_argument("--transport", choices=("inprocess", "uvicorn"), default="inprocess",
+                        help="call the ASGI app directly or over HTTP via a local uvicorn")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"request kind weights, kinds: {', '.join(REQUEST_KINDS)} (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help=f"comma-separated concurrency steps (default {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per step (default 10)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="single-client warm-up seconds (default 2)")
+    parser.add_argument("--matches", type=int, default=500,
+                        help="distinct fixtures in the request pool; fewer means more cache hits (default 500)")
+    parser.add_argument("--port", type=int, default=UVICORN_PORT, help="port for --transport uvicorn")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
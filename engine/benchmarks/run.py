@@ -0,0 +1,104 @@
+"""
+Engine micro-benchmarks with regression gates
+
+Run from the engine directory:
+
+    python -m benchmarks.run                    # compare against baselines.json
+    python -m benchmarks.run --update-baseline  # record new baselines
+    python -m benchmarks.run -k predict_full --threshold 0.15
+
+Each case reports throughput (ops/sec, best of several timed repeats) and
+peak traced allocation per call (KiB). A case fails when throughput drops,
+or peak allocation grows, by more than the threshold relative to its stored
+baseline. Baselines are machine specific: refresh them on the machine that
+runs the gate.
+"""
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.cases import build_cases
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 0.25
+REPEATS = 9
+
+
+def measure(fn) -> dict:
+    """Throughput and peak allocation for one benchmark callable"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"ops_per_sec": 1.0 / best, "peak_kib": peak / 1024}
+
+
+def compare(name: str, result: dict, baseline: dict, threshold: float) -> list:
+    """Regression messages for one case, empty when within threshold"""
+    if baseline is None:
+        return []
+
+    failures = []
+    speed_ratio = result["ops_per_sec"] / baseline["ops_per_sec"]
+    if speed_ratio < 1 - threshold:
+        failures.append(f"{name}: throughput {speed_ratio:.0%} of baseline")
+
+    if baseline["peak_kib"] > 0:
+        memory_ratio = result["peak_kib"] / baseline["peak_kib"]
+        if memory_ratio > 1 + threshold:
+            failures.append(f"{name}: peak allocation {memory_ratio:.0%} of baseline")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Predictsports engine benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional regression before failing (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write results to baselines.json instead of comparing")
+    args = parser.parse_args(argv)
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    cases = {name: fn for name, fn in build_cases().items() if args.filter in name}
+
+    results = {}
+    failures = []
+    print(f"{'case':<44}{'ops/sec':>14}{'peak KiB':>12}{'vs base':>10}")
+    for name, fn in cases.items():
+        result = measure(fn)
+        results[name] = result
+        baseline = baselines.get(name)
+        relative = f"{result['ops_per_sec'] / baseline['ops_per_sec']:.0%}" if baseline else "new"
+        print(f"{name:<44}{result['ops_per_sec']:>14,.1f}{result['peak_kib']:>12,.1f}{relative:>10}")
+        if not args.update_baseline:
+            failures.extend(compare(name, result, baseline, args.threshold))
+
+    if args.update_baseline:
+        baselines.update(
+            {name: {key: round(value, 2) for key, value in result.items()} for name, result in results.items()}
+        )
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 0
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,90 @@
 Feature Engineering Module
 Generates comprehensive features for prediction models
 """
-import numpy as np  # noqa: F401
-import pandas as pd  # noqa: F401
-from typing import Dict, Any, List, Tuple
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+from src.features.stats_store import stats_store
+from src.lib.metrics import ENGINE_STAGE_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
+# Column order of the batch feature matrix, matching engineer_match_features
+FEATURE_NAMES = (
+    "form_index_home",
+    "form_index_away",
+    "momentum_home",
+    "momentum_away",
+    "home_advantage",
+    "xg_differential",
+    "defensive_stability_home",
+    "defensive_stability_away",
+    "fatigue_home",
+    "fatigue_away",
+    "rotation_risk_home",
+    "rotation_risk_away",
+    "motivation_home",
+    "motivation_away",
+    "weather_impact",
+    "referee_bias",
+)
+
+# Flat input columns for engineer_match_features_batch and their defaults.
+# home_/away_ prefixed team fields mirror the per-match team dicts; nested
+# dicts are flattened (home_record -> home_record_wins/played, weather ->
+# weather_*, weather_affinity -> home_wind_resistance/home_rain_affinity)
+# and the referee's aggregates arrive pre-joined as referee_* columns.
+# Absent team and referee columns are filled from the statistics store when
+# home_team_id / away_team_id / referee_id columns are given.
+BATCH_COLUMN_DEFAULTS = {
+    "home_recent_results": "",
+    "away_recent_results": "",
+    "home_points_last_5": 0,
+    "away_points_last_5": 0,
+    "home_points_last_10": 0,
+    "away_points_last_10": 0,
+    "home_points_last_20": 0,
+    "away_points_last_20": 0,
+    "home_record_wins": 0,
+    "home_record_played": 1,
+    "home_xg_avg": 1.5,
+    "away_xg_avg": 1.5,
+    "home_clean_sheets": 0,
+    "away_clean_sheets": 0,
+    "home_goals_conceded": 0,
+    "away_goals_conceded": 0,
+    "home_matches_played": 1,
+    "away_matches_played": 1,
+    "home_days_since_last_match": 7,
+    "away_days_since_last_match": 7,
+    "home_matches_in_14_days": 1,
+    "away_matches_in_14_days": 1,
+    "home_squad_depth": 20,
+    "away_squad_depth": 20,
+    "home_key_players_out": 0,
+    "away_key_players_out": 0,
+    "competition_stage": "mid",
+    "home_last_result": "",
+    "away_last_result": "",
+    "home_cup_participation": False,
+    "away_cup_participation": False,
+    "home_championship_contention": False,
+    "away_championship_contention": False,
+    "weather_wind_speed": 0,
+    "weather_rain_probability": 0,
+    "weather_temperature": 15,
+    "home_wind_resistance": 0.5,
+    "home_rain_affinity": 0.3,
+    "referee_known": False,
+    "referee_home_wins": 0,
+    "referee_away_wins": 0,
+    "referee_total_matches": 1,
+    "referee_yellow_cards": 0,
+}
+
+FORM_WEIGHTS = (1.0, 0.9, 0.8, 0.7, 0.6)
+STAGE_MODIFIERS = {"early": 0.7, "mid": 0.5, "late": 0.2}
+
 
 class FeatureEngineer:
     """Generate features from match and team data"""
@@ -160,17 +237,20 @@ class FeatureEngineer:
 
     @staticmethod
     def calculate_referee_bias_score(
-        referee_id: str, home_team_id: int, away_team_id: int, referee_data: Dict
+        referee_id: str, home_team_id: int, away_team_id: int, referee_data: Optional[Dict] = None
     ) -> float:
         """
         Calculate referee bias score
         Positive = favors home team, Negative = favors away
+        Without referee_data the referee is looked up in the statistics store
         """
-        if referee_id not in referee_data:
+        if referee_data is None:
+            ref_stats = stats_store.referee_stats(referee_id)
+        else:
+            ref_stats = referee_data.get(referee_id)
+        if ref_stats is None:
             return 0.0
 
-        ref_stats = referee_data[referee_id]
-
         # Home win rate when this referee officiates
         home_bias = (ref_stats.get("home_wins", 0) - ref_stats.get("away_wins", 0)) / max(
             ref_stats.get("total_matches", 1), 1
@@ -185,12 +265,15 @@ class FeatureEngineer:
         return min(1.0, max(-1.0, bias_score))
 
     @staticmethod
+    @timed(ENGINE_STAGE_SECONDS, stage="match_features", mode="single")
     def engineer_match_features(match_data: Dict[str, Any], historical_data: Dict) -> Dict[str, float]:
         """
         Generate all features for a match
+        Team fields and referee aggregates not supplied inline come from the
+        statistics store
         """
-        home_team = match_data["home_team"]
-        away_team = match_data["away_team"]
+        home_team = stats_store.with_team_stats(match_data["home_team"])
+        away_team = stats_store.with_team_stats(match_data["away_team"])
 
         features = {
             "form_index_home": FeatureEngineer.calculate_form_index(
@@ -261,8 +344,114 @@ class FeatureEngineer:
                 match_data.get("referee_id", ""),
                 home_team.get("id", 0),
                 away_team.get("id", 0),
-                historical_data.get("referee_data", {}),
+                historical_data.get("referee_data"),
             ),
         }
 
         return features
+
+    @staticmethod
+    @timed(ENGINE_STAGE_SECONDS, stage="match_features", mode="batch")
+    def engineer_match_features_batch(matches) -> np.ndarray:
+        """
+        Generate all features for N matches at once
+        Takes a DataFrame or dict of equal-length arrays using the flat
+        BATCH_COLUMN_DEFAULTS columns (missing columns take their default)
+        and returns an N x 16 matrix with columns in FEATURE_NAMES order
+        """
+        if hasattr(matches, "to_dict"):
+            matches = {name: matches[name].to_numpy() for name in matches.columns}
+
+        matches = stats_store.with_stats_columns(matches, BATCH_COLUMN_DEFAULTS)
+        size = len(next(iter(matches.values()))) if matches else 0
+
+        def column(name, dtype=float):
+            values = matches.get(name)
+            if values is None:
+                return np.full(size, BATCH_COLUMN_DEFAULTS[name], dtype=dtype)
+            return np.asarray(values, dtype=dtype)
+
+        def form_index(results):
+            # Results may be "WDL" strings or ["W", "D", "L"] lists
+            results = np.asarray(
+                ["".join(row) if isinstance(row, (list, tuple)) else row for row in results],
+                dtype=str,
+            ).astype("U5")
+            played = np.char.str_len(results)
+            chars = results.view("U1").reshape(size, 5) if size else np.empty((0, 5), dtype="U1")
+            points = (chars == "W") * 3 + (chars == "D") * 1
+            weights = np.array(FORM_WEIGHTS)
+            denominator = 3 * np.cumsum(weights)[np.maximum(played, 1) - 1]
+            return np.where(played > 0, points @ weights / denominator, 0.5)
+
+        def momentum(side):
+            # (last_5 - last_10) + (last_10 - last_20) telescopes to last_5 - last_20
+            trend = column(f"{side}_points_last_5") - column(f"{side}_points_last_20")
+            return np.clip(trend / 45.0, -1.0, 1.0)
+
+        def defensive_stability(side):
+            played = np.maximum(column(f"{side}_matches_played"), 1)
+            rating = column(f"{side}_clean_sheets") / played - column(f"{side}_goals_conceded") / played / 3
+            return np.clip(rating, 0.0, 1.0)
+
+        def fatigue(side):
+            rest_factor = np.minimum(1.0, column(f"{side}_days_since_last_match") / 7.0)
+            congestion = column(f"{side}_matches_in_14_days") / 5.0
+            return np.clip((1.0 - rest_factor) + congestion * 0.5, 0.0, 1.0)
+
+        stage = column("competition_stage", object)
+        stage_modifier = np.full(size, 0.5)
+        for name, modifier in STAGE_MODIFIERS.items():
+            stage_modifier[stage == name] = modifier
+
+        def rotation_risk(side):
+            likelihood = column(f"{side}_key_players_out") / np.maximum(column(f"{side}_squad_depth"), 1)
+            return np.minimum(1.0, likelihood + stage_modifier)
+
+        def motivation(side):
+            last_result = column(f"{side}_last_result", object)
+            base = np.select([last_result == "L", last_result == "W"], [0.7, 0.6], default=0.5)
+            base = base + 0.15 * column(f"{side}_cup_participation", bool)
+            base = base + 0.2 * column(f"{side}_championship_contention", bool)
+            return np.minimum(1.0, base)
+
+        home_win_rate = column("home_record_wins") / np.maximum(column("home_record_played"), 1)
+
+        home_xg = column("home_xg_avg")
+        away_xg = column("away_xg_avg")
+
+        weather = (
+            -column("weather_wind_speed") / 50 * column("home_wind_resistance")
+            - column("weather_rain_probability") * column("home_rain_affinity")
+            - np.abs(column("weather_temperature") - 15) / 20 * 0.2
+        )
+
+        referee_matches = np.maximum(column("referee_total_matches"), 1)
+        home_bias = (column("referee_home_wins") - column("referee_away_wins")) / referee_matches
+        card_variance = column("referee_yellow_cards") / referee_matches
+        referee_bias = np.where(
+            column("referee_known", bool),
+            np.clip(home_bias * 0.6 + (card_variance - 4) / 10 * 0.4, -1.0, 1.0),
+            0.0,
+        )
+
+        return np.column_stack(
+            [
+                form_index(column("home_recent_results", object)),
+                form_index(column("away_recent_results", object)),
+                momentum("home"),
+                momentum("away"),
+                np.clip((home_win_rate - 0.46) * 2, -1.0, 1.0),
+                (home_xg - away_xg) / np.maximum(home_xg + away_xg, 1.0),
+                defensive_stability("home"),
+                defensive_stability("away"),
+                fatigue("home"),
+                fatigue("away"),
+                rotation_risk("home"),
+                rotation_risk("away"),
+                motivation("home"),
+                motivation("away"),
+                np.clip(weather, -1.0, 1.0),
+                referee_bias,
+            ]
+        )
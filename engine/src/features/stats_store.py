@@ -0,0 +1,315 @@
+"""
+Statistics Store Module
+Referee and team aggregates preloaded into memory-mapped arrays with dense
+integer-id indexes, so feature engineering looks them up in O(1) instead of
+receiving them inline with every request. Snapshots are written to a new
+directory and published by replacing a CURRENT pointer file; readers pick a
+new snapshot up without a restart, and every worker maps the same pages.
+"""
+import argparse
+import json
+import numpy as np
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+import logging
+from src.lib.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Float columns per table; team fields mirror the flat BATCH_COLUMN_DEFAULTS
+# names without their home_/away_ prefix
+REFEREE_COLUMNS = ("home_wins", "away_wins", "total_matches", "yellow_cards")
+TEAM_COLUMNS = ("home_record_wins", "home_record_played", "squad_depth", "wind_resistance", "rain_affinity")
+# Flat batch columns each side's team stats fill; the batch features only use
+# the home side's record and weather affinity
+TEAM_BATCH_COLUMNS = {
+    "home": {
+        "home_record_wins": "home_record_wins",
+        "home_record_played": "home_record_played",
+        "squad_depth": "home_squad_depth",
+        "wind_resistance": "home_wind_resistance",
+        "rain_affinity": "home_rain_affinity",
+    },
+    "away": {"squad_depth": "away_squad_depth"},
+}
+
+POINTER = "CURRENT"
+# Snapshots kept on disk; older ones may still be mapped by slow readers
+KEEP_SNAPSHOTS = 2
+
+
+def _as_id(key) -> int:
+    """Integer id for a key (ints or numeric strings), -1 when it has none"""
+    try:
+        return int(key)
+    except (TypeError, ValueError):
+        return -1
+
+
+def flatten_team(team: Dict) -> Dict[str, float]:
+    """Team dict in request shape (home_record, weather_affinity, ...) as TEAM_COLUMNS"""
+    flat = {name: team[name] for name in TEAM_COLUMNS if name in team}
+    home_record = team.get("home_record") or {}
+    weather_affinity = team.get("weather_affinity") or {}
+    for name, value in (
+        ("home_record_wins", home_record.get("wins")),
+        ("home_record_played", home_record.get("played")),
+        ("squad_depth", team.get("squad_depth")),
+        ("wind_resistance", weather_affinity.get("wind_resistance")),
+        ("rain_affinity", weather_affinity.get("rain_affinity")),
+    ):
+        if value is not None:
+            flat[name] = value
+    return flat
+
+
+class StatsTable:
+    """
+    One table of float columns keyed by integer id
+    values is an N x len(columns) matrix (NaN where a field is unknown) and
+    index maps id -> row densely (-1 for absent ids); both are read-only
+    memory maps when loaded from disk.
+    """
+
+    def __init__(self, columns: tuple, values: np.ndarray = None, index: np.ndarray = None):
+        self.columns = columns
+        self.positions = {name: i for i, name in enumerate(columns)}
+        self.values = np.empty((0, len(columns))) if values is None else values
+        self.index = np.empty(0, dtype=np.int32) if index is None else index
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def from_records(cls, columns: tuple, records: Dict) -> "StatsTable":
+        """Table from {id: {column: value}}; missing fields become NaN"""
+        ids = np.array([_as_id(key) for key in records], dtype=np.int64)
+        if (ids < 0).any():
+            raise ValueError("Statistics ids must be non-negative integers")
+        values = np.array(
+            [[float(record.get(name, np.nan)) for name in columns] for record in records.values()],
+            dtype=np.float64,
+        ).reshape(len(ids), len(columns))
+        index = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int32)
+        index[ids] = np.arange(len(ids), dtype=np.int32)
+        return cls(columns, values, index)
+
+    def row(self, key) -> Optional[int]:
+        key = _as_id(key)
+        if 0 <= key < len(self.index):
+            row = int(self.index[key])
+            if row >= 0:
+                return row
+        return None
+
+    def get(self, key) -> Optional[Dict[str, float]]:
+        """Known fields for one id, None if the id is absent"""
+        row = self.row(key)
+        if row is None:
+            return None
+        return {
+            name: value
+            for name, value in zip(self.columns, self.values[row].tolist())
+            if not np.isnan(value)
+        }
+
+    def rows(self, keys) -> np.ndarray:
+        """Rows for many ids at once, -1 where an id is absent"""
+        ids = np.asarray(keys)
+        if ids.dtype.kind not in "iu":
+            ids = np.array([_as_id(key) for key in keys], dtype=np.int64)
+        in_range = (ids >= 0) & (ids < len(self.index))
+        return np.where(in_range, self.index[np.where(in_range, ids, 0)] if len(self.index) else -1, -1)
+
+    def column(self, name: str, keys) -> np.ndarray:
+        """One column for many ids, NaN where the id or the field is unknown"""
+        rows = self.rows(keys)
+        if not len(self.values):
+            return np.full(len(rows), np.nan)
+        return np.where(rows >= 0, self.values[np.maximum(rows, 0), self.positions[name]], np.nan)
+
+    def save(self, directory: str, name: str):
+        np.save(os.path.join(directory, f"{name}.values.npy"), np.ascontiguousarray(self.values))
+        np.save(os.path.join(directory, f"{name}.index.npy"), np.ascontiguousarray(self.index))
+
+    @classmethod
+    def load(cls, directory: str, name: str, columns: tuple) -> "StatsTable":
+        return cls(
+            columns,
+            np.load(os.path.join(directory, f"{name}.values.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, f"{name}.index.npy"), mmap_mode="r"),
+        )
+
+
+class StatsStore:
+    """
+    Referee and team tables served from the current on-disk snapshot
+    Lookups check the pointer file at most every reload_interval seconds and
+    swap both tables in together when it names a new snapshot.
+    """
+
+    def __init__(self, reload_interval: float = 30.0):
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self.directory = None
+        self.snapshot = None
+        self._checked_at = float("-inf")
+        self._set_tables(StatsTable(REFEREE_COLUMNS), StatsTable(TEAM_COLUMNS))
+
+    def _set_tables(self, referees: StatsTable, teams: StatsTable):
+        # One tuple assignment so readers never mix two snapshots
+        self._tables = (referees, teams)
+
+    @property
+    def referees(self) -> StatsTable:
+        self.maybe_reload()
+        return self._tables[0]
+
+    @property
+    def teams(self) -> StatsTable:
+        self.maybe_reload()
+        return self._tables[1]
+
+    @staticmethod
+    def write_snapshot(directory: str, referees: Dict, teams: Dict) -> str:
+        """Write a new snapshot from {id: stats} dicts and make it current"""
+        os.makedirs(directory, exist_ok=True)
+        snapshot = f"snapshot-{time.time_ns()}"
+        path = os.path.join(directory, snapshot)
+        os.makedirs(path)
+        StatsTable.from_records(REFEREE_COLUMNS, referees).save(path, "referees")
+        StatsTable.from_records(TEAM_COLUMNS, {key: flatten_team(team) for key, team in teams.items()}).save(path, "teams")
+
+        temporary = os.path.join(directory, f"{POINTER}.tmp")
+        with open(temporary, "w") as f:
+            f.write(snapshot)
+        os.replace(temporary, os.path.join(directory, POINTER))
+
+        # Drop old snapshots; on POSIX, readers still mapping them keep their pages
+        snapshots = sorted(name for name in os.listdir(directory) if name.startswith("snapshot-"))
+        for name in snapshots[:-KEEP_SNAPSHOTS]:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        logger.info(f"✅ Statistics snapshot {snapshot} written ({len(referees)} referees, {len(teams)} teams)")
+        return snapshot
+
+    @staticmethod
+    def _current(directory: str) -> Optional[str]:
+        try:
+            with open(os.path.join(directory, POINTER)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, directory: str) -> bool:
+        """Map the current snapshot under directory; returns False when there is none yet"""
+        self.directory = directory
+        self._checked_at = time.monotonic()
+        snapshot = self._current(directory)
+        if snapshot is None:
+            return False
+        path = os.path.join(directory, snapshot)
+        referees = StatsTable.load(path, "referees", REFEREE_COLUMNS)
+        teams = StatsTable.load(path, "teams", TEAM_COLUMNS)
+        with self._lock:
+            self._set_tables(referees, teams)
+            self.snapshot = snapshot
+        logger.info(f"✅ Statistics loaded from {snapshot} ({len(referees)} referees, {len(teams)} teams)")
+        return True
+
+    def maybe_reload(self):
+        """Reload when the pointer names a newer snapshot, checking at most every reload_interval"""
+        if self.directory is None or time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = time.monotonic()
+        snapshot = self._current(self.directory)
+        if snapshot is not None and snapshot != self.snapshot:
+            try:
+                self.load(self.directory)
+            except Exception as e:
+                logger.warning(f"Statistics reload failed, keeping {self.snapshot}: {e}")
+
+    def referee_stats(self, referee_id) -> Optional[Dict[str, float]]:
+        """Aggregates for one referee in the referee_data dict shape, None if unknown"""
+        return self.referees.get(referee_id)
+
+    def with_team_stats(self, team: Dict) -> Dict:
+        """team with home_record, squad_depth and weather_affinity filled from the store when absent"""
+        if all(name in team for name in ("home_record", "squad_depth", "weather_affinity")):
+            return team
+        stats = self.teams.get(team.get("id"))
+        if not stats:
+            return team
+        team = dict(team)
+        if "home_record" not in team and "home_record_played" in stats:
+            team["home_record"] = {
+                "wins": stats.get("home_record_wins", 0),
+                "played": stats["home_record_played"],
+            }
+        if "squad_depth" not in team and "squad_depth" in stats:
+            team["squad_depth"] = stats["squad_depth"]
+        if "weather_affinity" not in team:
+            affinity = {name: stats[name] for name in ("wind_resistance", "rain_affinity") if name in stats}
+            if affinity:
+                team["weather_affinity"] = affinity
+        return team
+
+    def with_stats_columns(self, columns: Dict, defaults: Dict) -> Dict:
+        """
+        Fill absent flat batch columns from the store
+        Team columns come from home_team_id / away_team_id and referee_*
+        columns from referee_id; unknown ids take the column default.
+        """
+        columns = dict(columns)
+        self.maybe_reload()
+        referees, teams = self._tables
+        for side, targets in TEAM_BATCH_COLUMNS.items():
+            team_ids = columns.get(f"{side}_team_id")
+            if team_ids is None or not len(teams):
+                continue
+            for name, target in targets.items():
+                if target not in columns:
+                    values = teams.column(name, team_ids)
+                    columns[target] = np.where(np.isnan(values), defaults[target], values)
+
+        referee_ids = columns.get("referee_id")
+        if referee_ids is not None and "referee_known" not in columns and len(referees):
+            columns["referee_known"] = referees.rows(referee_ids) >= 0
+            for name in REFEREE_COLUMNS:
+                values = referees.column(name, referee_ids)
+                columns[f"referee_{name}"] = np.where(np.isnan(values), defaults[f"referee_{name}"], values)
+        return columns
+
+    def stats(self) -> dict:
+        referees, teams = self._tables
+        return {
+            "snapshot": self.snapshot,
+            "referees": len(referees),
+            "teams": len(teams),
+        }
+
+
+stats_store = StatsStore(reload_interval=settings.STATS_RELOAD_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish referee and team statistics for the engine")
+    parser.add_argument("--referees", help="JSON object of referee_id -> referee_data stats")
+    parser.add_argument("--teams", help="JSON object of team_id -> team stats (request team shape or flat)")
+    parser.add_argument("--out", default="data/stats", help="Statistics directory served by the engine")
+    args = parser.parse_args()
+
+    def read(path):
+        if not path:
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    snapshot = StatsStore.write_snapshot(args.out, read(args.referees), read(args.teams))
+    print(json.dumps({"directory": args.out, "snapshot": snapshot}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import importlib
+import importlib.util
+import json
+import logging
+import numpy as np
+from functools import lru_cache
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# Optional fast JSON encoder for the default path; cheap to import
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Accept-header aliases for the canonical media types above
+MEDIA_ALIASES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    ARROW: ARROW,
+}
+
+# Optional libraries behind the binary formats, imported on first use so they
+# stay off the startup path
+FORMAT_LIBRARIES = {
+    MSGPACK: "msgpack",
+    ARROW: "pyarrow",
+}
+
+@lru_cache(maxsize=None)
+def available_media_types() -> tuple:
+    """Media types whose encoder is installed"""
+    return (JSON,) + tuple(
+        media_type for media_type, module in FORMAT_LIBRARIES.items()
+        if importlib.util.find_spec(module) is not None
+    )
+
+@lru_cache(maxsize=None)
+def _library(media_type: str):
+    module = importlib.import_module(FORMAT_LIBRARIES[media_type])
+    if media_type == ARROW:
+        importlib.import_module("pyarrow.ipc")
+    return module
+
+def _default(value):
+    """Fallback for NumPy values the encoders do not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+def dumps_json(content) -> bytes:
+    """JSON bytes via orjson when installed (NumPy arrays serialize without tolist())"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default).encode()
+
+def negotiate(accept: str, offered: tuple = (JSON, MSGPACK)) -> str:
+    """Pick the response media type for an Accept header
+
+    Honours q-values, treats a missing header or */* as JSON, and raises 406
+    when nothing acceptable is both offered by the route and installed.
+    """
+    if not accept:
+        return JSON
+
+    supported = [media_type for media_type in offered if media_type in available_media_types()]
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        if media_range in ("*/*", "application/*"):
+            media_type = JSON
+        else:
+            media_type = MEDIA_ALIASES.get(media_range.lower())
+        if media_type in supported:
+            candidates.append((-quality, position, media_type))
+
+    if not candidates:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Not acceptable; this endpoint can return {', '.join(supported)}",
+        )
+    return min(candidates)[2]
+
+def arrow_table_bytes(columns: dict) -> bytes:
+    """Arrow IPC stream of one record batch built from equal-length columns"""
+    pyarrow = _library(ARROW)
+    table = pyarrow.table({name: np.asarray(values) for name, values in columns.items()})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def encode(content, media_type: str, columns: dict = None) -> Response:
+    """Serialize a route result in the negotiated format
+
+    content is the nested JSON-shaped result; columns is the equal-length
+    column view used for the Arrow format (required when ARROW was offered).
+    """
+    if media_type == MSGPACK:
+        body = _library(MSGPACK).packb(content, default=_default, use_bin_type=True)
+    elif media_type == ARROW:
+        body = arrow_table_bytes(columns)
+    else:
+        body = dumps_json(content)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
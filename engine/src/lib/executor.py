@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.lib.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+class ExecutorSaturated(Exception):
+    """Raised when the engine queue is full and the call is rejected"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Prediction engine saturated")
+        self.retry_after = retry_after
+
+def _timed_call(fn, args):
+    """Run fn in the worker and report when it actually started"""
+    return time.monotonic(), fn(*args)
+
+class PredictionExecutor:
+    """Runs CPU-bound engine calls off the event loop
+
+    mode is one of:
+      inline  - run on the event loop (no isolation, lowest overhead)
+      thread  - run on a thread pool (NumPy releases the GIL for array work)
+      process - run on a process pool (full isolation, pickling overhead)
+
+    At most max_workers calls run at once and at most max_queue more wait
+    behind them; anything beyond that is rejected with ExecutorSaturated so
+    the route can answer 503 instead of letting latency grow without bound.
+    """
+
+    def __init__(self, mode: str, max_workers: int, max_queue: int, retry_after: int = 1):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = None
+        self.pending = 0
+        self.counters = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "run_seconds": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="engine")
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"✅ Engine executor started ({self.mode}, {self.max_workers} workers)")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.max_workers)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the configured backend, subject to admission control"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.counters["rejected"] += 1
+            raise ExecutorSaturated(self.retry_after)
+
+        self.pending += 1
+        self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self.queue_depth)
+        submitted = time.monotonic()
+        try:
+            if self.mode == "inline":
+                started, result = _timed_call(fn, args)
+            else:
+                loop = asyncio.get_running_loop()
+                started, result = await loop.run_in_executor(self._get_pool(), _timed_call, fn, args)
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        wait = max(0.0, started - submitted)
+        self.counters["completed"] += 1
+        self.counters["wait_seconds"] += wait
+        self.counters["max_wait_seconds"] = max(self.counters["max_wait_seconds"], wait)
+        self.counters["run_seconds"] += time.monotonic() - started
+        return result
+
+    def stats(self) -> dict:
+        """Queue depth, wait-time and throughput counters"""
+        completed = self.counters["completed"]
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.pending,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.counters["max_queue_depth"],
+            "completed": completed,
+            "failed": self.counters["failed"],
+            "rejected": self.counters["rejected"],
+            "mean_wait_ms": 1000 * self.counters["wait_seconds"] / completed if completed else 0.0,
+            "max_wait_ms": 1000 * self.counters["max_wait_seconds"],
+            "mean_run_ms": 1000 * self.counters["run_seconds"] / completed if completed else 0.0,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("✅ Engine executor stopped")
+
+executor = PredictionExecutor(
+    mode=settings.ENGINE_EXECUTOR,
+    max_workers=settings.ENGINE_WORKERS,
+    max_queue=settings.ENGINE_QUEUE_SIZE,
+    retry_after=settings.ENGINE_RETRY_AFTER,
+)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+from src.lib.config import settings
+from src.lib.encoding import dumps_json
+from src.lib import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts to re-establish a lost subscription
+RESUBSCRIBE_DELAY = 0.5
+RESUBSCRIBE_MAX_DELAY = 30.0
+
+class InPlayHub:
+    """Fans live match updates out to WebSocket subscribers through Redis pub/sub
+
+    An update is computed once, published once on the match's channel and
+    stored as the match's latest state. Each process holds a single Redis
+    subscription per match however many local sockets watch it, and copies
+    every message into per-socket queues. Queues keep only the newest
+    updates, so a slow viewer skips stale states instead of stalling others.
+    When Redis is unavailable, updates are delivered to this process only
+    and the subscription is retried until it is back.
+    """
+
+    def __init__(self, ttl: int, queue_size: int = 8, prefix: str = "inplay"):
+        self.ttl = ttl
+        self.queue_size = queue_size
+        self.prefix = prefix
+        self._subscribers = {}
+        self._listeners = {}
+        self._latest = {}
+        self.counters = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "errors": 0,
+            "resubscribed": 0,
+        }
+
+    def channel(self, match_id: str) -> str:
+        return f"{self.prefix}:updates:{match_id}"
+
+    async def save_match(self, match_id: str, state: dict):
+        """Store a match's pre-match state so any worker can apply its events"""
+        try:
+            await redis_client.execute("set", f"{self.prefix}:match:{match_id}", json.dumps(state), ex=self.ttl)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"In-play state write failed: {str(e)}")
+
+    async def load_match(self, match_id: str):
+        try:
+            value = await redis_client.execute("get", f"{self.prefix}:match:{match_id}")
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"In-play state read failed: {str(e)}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def publish(self, match_id: str, update: dict):
+        """Send an update to every subscriber of match_id, in every process"""
+        message = dumps_json(update).decode()
+        self._latest[match_id] = message
+        self.counters["published"] += 1
+        try:
+            await redis_client.execute("set", f"{self.prefix}:latest:{match_id}", message, ex=self.ttl)
+            await redis_client.execute("publish", self.channel(match_id), message)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"In-play publish failed, delivering locally: {str(e)}")
+            self._broadcast(match_id, message)
+
+    async def latest(self, match_id: str):
+        """Most recent update for match_id (JSON text), or None"""
+        try:
+            value = await redis_client.execute("get", f"{self.prefix}:latest:{match_id}")
+            if value is not None:
+                return value
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"In-play latest read failed: {str(e)}")
+        return self._latest.get(match_id)
+
+    def subscribe(self, match_id: str) -> asyncio.Queue:
+        """Queue receiving match_id's updates; release it with unsubscribe()"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(match_id, set()).add(queue)
+        listener = self._listeners.get(match_id)
+        if listener is None or listener.done():
+            self._listeners[match_id] = asyncio.create_task(self._listen(match_id))
+        return queue
+
+    def unsubscribe(self, match_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(match_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[match_id]
+            listener = self._listeners.pop(match_id, None)
+            if listener is not None:
+                listener.cancel()
+
+    async def _listen(self, match_id: str):
+        """Relay the match's Redis channel into local queues until cancelled
+
+        A lost subscription is re-established, with backoff, for as long as
+        the match has local subscribers; after reconnecting, the stored latest
+        update is re-delivered so viewers catch up on anything they missed.
+        """
+        delay = RESUBSCRIBE_DELAY
+        reconnecting = False
+        while match_id in self._subscribers:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(self.channel(match_id))
+                if reconnecting:
+                    self.counters["resubscribed"] += 1
+                    latest = await self.latest(match_id)
+                    if latest is not None:
+                        self._broadcast(match_id, latest)
+                delay = RESUBSCRIBE_DELAY
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._broadcast(match_id, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning(f"In-play subscription for {match_id} lost, retrying in {delay:.1f}s: {str(e)}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+            reconnecting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+
+    def _broadcast(self, match_id: str, message: str):
+        for queue in self._subscribers.get(match_id, ()):
+            if queue.full():
+                # Every update is a full state, so the oldest queued one is redundant
+                queue.get_nowait()
+                self.counters["dropped"] += 1
+            queue.put_nowait(message)
+            self.counters["delivered"] += 1
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "matches_watched": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+    async def close(self):
+        for listener in self._listeners.values():
+            listener.cancel()
+        self._listeners.clear()
+        self._subscribers.clear()
+
+inplay_hub = InPlayHub(ttl=settings.INPLAY_TTL, queue_size=settings.INPLAY_QUEUE_SIZE)
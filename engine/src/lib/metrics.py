@@ -0,0 +1,193 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Latency buckets in seconds, from 50us engine stages up to slow requests
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe_labels(self.labels, time.perf_counter() - self.started)
+        return False
+
+class _BoundHistogram:
+    """Histogram series with its label values resolved once up front"""
+
+    __slots__ = ("histogram", "key")
+
+    def __init__(self, histogram, key: tuple):
+        self.histogram = histogram
+        self.key = key
+
+    def observe(self, value: float):
+        self.histogram.observe_labels(self.key, value)
+
+    def time(self) -> _Timer:
+        return _Timer(self.histogram, self.key)
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        # Text format 0.0.4 types the family by its sample name, which carries the suffix
+        self.family = f"{name}_total"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple([labels.get(name, "") for name in self.labelnames])
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.family}{_format_labels(self.labelnames, key)}", value
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.family = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        self.observe_labels(tuple([labels.get(name, "") for name in self.labelnames]), value)
+
+    def observe_labels(self, key: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def labels(self, **labels) -> _BoundHistogram:
+        """Series for fixed label values, for hot paths that time the same thing repeatedly"""
+        return _BoundHistogram(self, tuple([labels.get(name, "") for name in self.labelnames]))
+
+    def time(self, **labels) -> _Timer:
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self, tuple([labels.get(name, "") for name in self.labelnames]))
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)}", cumulative
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)}", total
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)}", count
+
+class MetricsRegistry:
+    """Process-local metric registry rendered in Prometheus text format
+
+    Metrics recorded inside process-pool workers stay in those workers; use
+    the inline or thread executor when per-model timings are needed.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector):
+        """Add a callable returning (name, kind, documentation, value) gauges read at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.family} {metric.documentation}")
+            lines.append(f"# TYPE {metric.family} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, documentation, value in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+def timed(histogram: Histogram, **labels):
+    """Decorator observing each call's wall time on histogram"""
+    series = histogram.labels(**labels)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with series.time():
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+registry = MetricsRegistry()
+
+ENGINE_MODEL_SECONDS = registry.histogram(
+    "engine_model_seconds", "Time spent in each ensemble member", ("model", "mode")
+)
+ENGINE_STAGE_SECONDS = registry.histogram(
+    "engine_stage_seconds", "Time spent in each prediction pipeline stage", ("stage", "mode")
+)
+MICRO_BATCH_SIZE = registry.histogram(
+    "micro_batch_size", "Requests coalesced into each micro-batched engine call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+MICRO_BATCH_WAIT_SECONDS = registry.histogram(
+    "micro_batch_wait_seconds", "Time a request waited for its micro-batch to be dispatched"
+)
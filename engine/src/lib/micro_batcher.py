@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from src.lib.metrics import MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into one batched call
+
+    Items submitted within max_wait seconds of the first pending one (or until
+    max_batch_size are pending) go to run_batch together as one list, and each
+    caller gets back its own element of the returned list. If the batch call
+    raises, every caller in that batch sees the exception.
+    """
+
+    def __init__(self, run_batch, max_batch_size: int = 64, max_wait: float = 0.002):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._running = set()
+        self.counters = {
+            "batches": 0,
+            "items": 0,
+            "failed": 0,
+            "max_batch_size": 0,
+            "wait_seconds": 0.0,
+        }
+
+    async def submit(self, item):
+        """Queue item for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list):
+        dispatched = time.monotonic()
+        for _, _, submitted in batch:
+            wait = dispatched - submitted
+            self.counters["wait_seconds"] += wait
+            MICRO_BATCH_WAIT_SECONDS.observe(wait)
+        MICRO_BATCH_SIZE.observe(len(batch))
+        self.counters["batches"] += 1
+        self.counters["items"] += len(batch)
+        self.counters["max_batch_size"] = max(self.counters["max_batch_size"], len(batch))
+
+        try:
+            results = await self.run_batch([item for item, _, _ in batch])
+        except Exception as e:
+            self.counters["failed"] += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            # Callers that went away (client disconnect) have cancelled futures
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        batches = self.counters["batches"]
+        items = self.counters["items"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": 1000 * self.max_wait,
+            "pending": len(self._pending),
+            "batches": batches,
+            "items": items,
+            "failed": self.counters["failed"],
+            "largest_batch": self.counters["max_batch_size"],
+            "mean_batch_size": items / batches if batches else 0.0,
+            "mean_wait_ms": 1000 * self.counters["wait_seconds"] / items if items else 0.0,
+        }
@@ -0,0 +1,156 @@
+import logging
+import os
+import socket
+import time
+from src.lib.config import settings
+from src.lib.encoding import dumps_json
+from src.lib.prediction_cache import payload_digest
+from src.lib import redis_client
+
+logger = logging.getLogger(__name__)
+
+class PrecomputedPredictions:
+    """Versioned store of /predict payloads written ahead of demand
+
+    A refresh writes every payload under a new version with pipelined SETs,
+    then flips the current-version pointer in one atomic SET, so readers see
+    either the whole old set or the whole new one. Superseded versions expire
+    on their TTL. Readers cache the pointer for pointer_refresh seconds, which
+    makes serving a precomputed match a single GET.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        model_version: str,
+        pipeline_size: int = 500,
+        pointer_refresh: float = 5.0,
+        prefix: str = "precomputed",
+    ):
+        self.ttl = ttl
+        self.model_version = model_version
+        self.pipeline_size = pipeline_size
+        self.pointer_refresh = pointer_refresh
+        self.namespace = prefix
+        self.prefix = f"{prefix}:{model_version}"
+        self._version = None
+        self._version_read_at = float("-inf")
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "refreshes": 0,
+            "written": 0,
+        }
+        self.last_refresh = None
+
+    def set_model_version(self, model_version: str):
+        """Read and write the keys (and version pointer) of another model version"""
+        self.model_version = model_version
+        self.prefix = f"{self.namespace}:{model_version}"
+        self._version = None
+        self._version_read_at = float("-inf")
+
+    @property
+    def pointer_key(self) -> str:
+        return f"{self.prefix}:current"
+
+    async def claim_refresh(self, interval: int) -> bool:
+        """True for only one caller per interval across all workers (SET NX with an expiry)
+
+        The lock is per model version, so workers forked after a reload refresh
+        their own version straight away.
+        """
+        try:
+            claimed = await redis_client.execute(
+                "set", f"{self.prefix}:refresh", f"{socket.gethostname()}-{os.getpid()}", nx=True, ex=interval
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Precompute lock failed: {str(e)}")
+            return False
+        return bool(claimed)
+
+    def key(self, version: str, match_data: dict) -> str:
+        return f"{self.prefix}:{version}:{payload_digest(match_data)}"
+
+    async def current_version(self):
+        """Version readers should use, re-read from Redis at most every pointer_refresh seconds"""
+        now = time.monotonic()
+        if now - self._version_read_at >= self.pointer_refresh:
+            self._version = await redis_client.execute("get", self.pointer_key)
+            self._version_read_at = now
+        return self._version
+
+    async def get(self, match_data: dict):
+        """Precomputed payload for match_data as JSON text, or None"""
+        try:
+            version = await self.current_version()
+            value = await redis_client.execute("get", self.key(version, match_data)) if version else None
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Precomputed lookup failed: {str(e)}")
+            return None
+        self.counters["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def get_many(self, matches: list) -> list:
+        """Precomputed payloads (JSON text or None) for many matches in one MGET"""
+        try:
+            version = await self.current_version()
+            values = (
+                await redis_client.mget([self.key(version, match_data) for match_data in matches])
+                if version else [None] * len(matches)
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Precomputed bulk lookup failed: {str(e)}")
+            return [None] * len(matches)
+        hits = sum(value is not None for value in values)
+        self.counters["hits"] += hits
+        self.counters["misses"] += len(values) - hits
+        return values
+
+    async def publish(self, entries: list) -> str:
+        """Write (match_data, payload) pairs under a new version, then make it current
+
+        Returns the new version. Writes go out pipeline_size commands per round
+        trip; the pointer only moves once every write has been acknowledged.
+        """
+        started = time.perf_counter()
+        version = str(time.time_ns())
+        await redis_client.mset(
+            ((self.key(version, match_data), dumps_json(payload)) for match_data, payload in entries),
+            ex=self.ttl,
+            pipeline_size=self.pipeline_size,
+        )
+
+        await redis_client.execute("set", self.pointer_key, version, ex=self.ttl)
+        self._version = version
+        self._version_read_at = time.monotonic()
+
+        self.counters["refreshes"] += 1
+        self.counters["written"] += len(entries)
+        self.last_refresh = {
+            "version": version,
+            "matches": len(entries),
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+        logger.info(f"✅ Precomputed {len(entries)} predictions as version {version}")
+        return version
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "model_version": self.model_version,
+            "current_version": self._version,
+            "hit_ratio": self.counters["hits"] / lookups if lookups else 0.0,
+            "last_refresh": self.last_refresh,
+        }
+
+precomputed_predictions = PrecomputedPredictions(
+    ttl=settings.PRECOMPUTE_TTL,
+    model_version=settings.MODEL_VERSION,
+    pipeline_size=settings.PRECOMPUTE_PIPELINE_SIZE,
+)
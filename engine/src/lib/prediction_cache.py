@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from src.lib.config import settings
+from src.lib import redis_client
+
+logger = logging.getLogger(__name__)
+
+def payload_digest(payload: dict) -> str:
+    """sha256 of the canonical JSON of a normalized request payload"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class PredictionCache:
+    """Read-through Redis cache for prediction payloads
+
+    Keys are a hash of the canonical JSON of the normalized request plus the
+    model version, so a model upgrade never serves stale predictions.
+    Concurrent misses for the same key share a single computation, and any
+    Redis failure degrades to computing locally.
+    """
+
+    def __init__(self, ttl: int, model_version: str, enabled: bool = True, prefix: str = "prediction"):
+        self.ttl = ttl
+        self.model_version = model_version
+        self.enabled = enabled
+        self.prefix = prefix
+        self._inflight = {}
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "hit_seconds": 0.0,
+            "miss_seconds": 0.0,
+        }
+
+    def set_model_version(self, model_version: str):
+        self.model_version = model_version
+
+    def key(self, namespace: str, payload: dict) -> str:
+        """Cache key for a normalized request payload"""
+        return f"{self.prefix}:{namespace}:{self.model_version}:{payload_digest(payload)}"
+
+    async def get_or_compute(self, key: str, compute) -> dict:
+        """Return the cached payload for key, or await compute() and store it"""
+        if not self.enabled:
+            return await compute()
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            # The lookup runs detached from the caller, so a caller that goes
+            # away (client disconnect) cancels only its own wait, not the
+            # computation the other callers for this key share
+            task = asyncio.get_running_loop().create_task(self._fill(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda task: self._done(key, task))
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: str, compute) -> dict:
+        started = time.perf_counter()
+        cached = await self._get(key)
+        if cached is not None:
+            self.counters["hits"] += 1
+            self.counters["hit_seconds"] += time.perf_counter() - started
+            return cached
+
+        self.counters["misses"] += 1
+        result = await compute()
+        await self._set(key, result)
+        self.counters["miss_seconds"] += time.perf_counter() - started
+        return result
+
+    def _done(self, key: str, task: asyncio.Task):
+        del self._inflight[key]
+        # Mark a failure as retrieved in case every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    async def _get(self, key: str):
+        try:
+            value = await redis_client.execute("get", key)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Prediction cache read failed, computing locally: {str(e)}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def _set(self, key: str, value: dict):
+        try:
+            await redis_client.execute("set", key, json.dumps(value), ex=self.ttl)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Prediction cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and mean latencies"""
+        hits = self.counters["hits"]
+        misses = self.counters["misses"]
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "model_version": self.model_version,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "coalesced": self.counters["coalesced"],
+            "errors": self.counters["errors"],
+            "inflight": len(self._inflight),
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "mean_hit_ms": 1000 * self.counters["hit_seconds"] / hits if hits else 0.0,
+            "mean_miss_ms": 1000 * self.counters["miss_seconds"] / misses if misses else 0.0,
+        }
+
+prediction_cache = PredictionCache(
+    ttl=settings.PREDICTION_CACHE_TTL,
+    model_version=settings.MODEL_VERSION,
+    enabled=settings.PREDICTION_CACHE_ENABLED,
+)
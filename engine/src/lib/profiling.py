@@ -0,0 +1,168 @@
+import hmac
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import time
+from collections import deque
+from functools import partial
+from src.lib.config import settings
+from src.lib import redis_client
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Token"
+
+class _StackCollector:
+    """sys.setprofile hook summing self time per call stack (microseconds)"""
+
+    def __init__(self):
+        self.names = []
+        self.frames = []  # [started, time spent in children]
+        self.totals = {}
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == "call":
+            code = frame.f_code
+            self.names.append(f"{os.path.basename(code.co_filename)}:{code.co_qualname}")
+            self.frames.append([now, 0.0])
+        elif event == "c_call":
+            module = getattr(arg, "__module__", None) or "builtins"
+            self.names.append(f"{module}.{getattr(arg, '__qualname__', repr(arg))}")
+            self.frames.append([now, 0.0])
+        elif event in ("return", "c_return", "c_exception") and self.frames:
+            started, children = self.frames.pop()
+            elapsed = now - started
+            stack = ";".join(self.names)
+            self.names.pop()
+            self.totals[stack] = self.totals.get(stack, 0.0) + elapsed - children
+            if self.frames:
+                self.frames[-1][1] += elapsed
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack text: 'outer;inner <microseconds>' per line"""
+        return "".join(
+            f"{stack} {round(seconds * 1e6)}\n"
+            for stack, seconds in sorted(self.totals.items())
+            if round(seconds * 1e6) > 0
+        )
+
+def profile_call(fn, *args):
+    """Run fn(*args) under the stack collector; returns (result, collapsed stacks)
+
+    Module level so it pickles into process-pool workers like any engine task.
+    """
+    collector = _StackCollector()
+    sys.setprofile(collector)
+    try:
+        result = fn(*args)
+    finally:
+        sys.setprofile(None)
+    return result, collector.collapsed()
+
+class RequestProfiler:
+    """Opt-in deterministic profiles of individual engine calls
+
+    A request is profiled when it carries the configured token in
+    PROFILE_HEADER, or when it falls in the sample_rate fraction. Everything
+    else pays one comparison. Profiles are kept in collapsed-stack format,
+    ready for flamegraph.pl or speedscope: in Redis for ttl seconds, with an
+    index of the newest `keep`, so any worker can serve any worker's
+    profile. The newest `keep` are also held in memory, which is all that
+    is served while Redis is unavailable.
+    """
+
+    def __init__(self, token: str = "", sample_rate: float = 0.0, keep: int = 50, ttl: int = 3600, prefix: str = "profile"):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.ttl = ttl
+        self.prefix = prefix
+        self.profiles = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}:index"
+
+    def key(self, profile_id: str) -> str:
+        return f"{self.prefix}:{profile_id}"
+
+    def authorized(self, token) -> bool:
+        return bool(self.token) and token is not None and hmac.compare_digest(token, self.token)
+
+    def trigger(self, token=None):
+        """'header', 'sampled' or None for a request"""
+        if token is not None and self.authorized(token):
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def run(self, executor, route: str, trigger: str, fn, *args):
+        """executor.run(fn, *args) under the profiler; returns (result, profile id)"""
+        started = time.time()
+        timer = time.perf_counter()
+        result, collapsed = await executor.run(partial(profile_call, fn), *args)
+        profile_id = f"{socket.gethostname()}-{os.getpid()}-{next(self._ids)}"
+        profile = {
+            "id": profile_id,
+            "route": route,
+            "trigger": trigger,
+            "function": getattr(fn, "__name__", repr(fn)),
+            "started_at": started,
+            "duration_ms": 1000 * (time.perf_counter() - timer),
+            "collapsed": collapsed,
+        }
+        self.profiles.append(profile)
+        await self._store(profile)
+        logger.info(f"Profiled {route} ({trigger}) as {profile_id}")
+        return result, profile_id
+
+    async def _store(self, profile: dict):
+        try:
+            await redis_client.execute("set", self.key(profile["id"]), json.dumps(profile), ex=self.ttl)
+            await redis_client.execute("lpush", self.index_key, profile["id"])
+            await redis_client.execute("ltrim", self.index_key, 0, self.keep - 1)
+        except Exception as e:
+            logger.warning(f"Profile store failed, keeping it in this worker only: {str(e)}")
+
+    async def _stored(self) -> list:
+        """Profiles in Redis, newest first; expired ones are skipped"""
+        ids = await redis_client.execute("lrange", self.index_key, 0, self.keep - 1)
+        values = await redis_client.mget([self.key(profile_id) for profile_id in ids])
+        return [json.loads(value) for value in values if value is not None]
+
+    async def summaries(self) -> list:
+        try:
+            profiles = await self._stored()
+        except Exception as e:
+            logger.warning(f"Profile index read failed, listing this worker only: {str(e)}")
+            profiles = list(reversed(self.profiles))
+        return [
+            {name: value for name, value in profile.items() if name != "collapsed"}
+            for profile in profiles
+        ]
+
+    async def get(self, profile_id: str):
+        try:
+            value = await redis_client.execute("get", self.key(profile_id))
+            if value is not None:
+                return json.loads(value)
+        except Exception as e:
+            logger.warning(f"Profile read failed, checking this worker only: {str(e)}")
+        for profile in self.profiles:
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+profiler = RequestProfiler(
+    token=settings.PROFILE_TOKEN,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    keep=settings.PROFILE_KEEP,
+    ttl=settings.PROFILE_TTL,
+)
@@ -1,22 +1,117 @@
 import redis.asyncio as redis
+import asyncio
 import os
+import time
 import logging
+from src.lib.config import settings
 
 logger = logging.getLogger(__name__)
 
 redis_client = None
+# Subscriptions block reading a quiet channel indefinitely, so they get their
+# own client: no socket timeout and an unbounded pool kept apart from commands
+pubsub_client = None
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling Redis while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Fails Redis calls fast after repeated errors or timeouts
+
+    closed: calls go through; failure_threshold consecutive failures open it.
+    open: calls raise CircuitOpen without touching the pool for reset_timeout seconds.
+    half_open: a single trial call goes through; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = None
+        self.counters = {
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                self.counters["rejected"] += 1
+                return False
+            self.state = "half_open"
+            self.trial_started = None
+        if self.state == "half_open":
+            # A trial that never reported back (e.g. cancelled) is retried after reset_timeout
+            if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+                self.counters["rejected"] += 1
+                return False
+            self.trial_started = now
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self.counters["failures"] += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.counters["opened"] += 1
+                logger.warning(f"Redis circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trial_started = None
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+        }
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_BREAKER_FAILURES,
+    reset_timeout=settings.REDIS_BREAKER_RESET,
+)
 
 async def init_redis():
-    global redis_client
-    redis_client = await redis.from_url(
-        os.getenv("REDIS_URL", "redis://localhost:6379"),
+    global redis_client, pubsub_client
+    url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # Bounded pool: when every connection is busy, callers wait at most
+    # REDIS_POOL_TIMEOUT for one and then fail (and count against the breaker)
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        encoding="utf8",
+        decode_responses=True
+    )
+    redis_client = redis.Redis.from_pool(pool)
+    pubsub_client = redis.Redis.from_url(
+        url,
+        socket_timeout=None,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
         encoding="utf8",
         decode_responses=True
     )
     logger.info("✅ Redis connected")
 
 async def close_redis():
-    global redis_client
+    global redis_client, pubsub_client
+    if pubsub_client:
+        await pubsub_client.close()
+        pubsub_client = None
     if redis_client:
         await redis_client.close()
         logger.info("✅ Redis closed")
@@ -25,3 +120,66 @@ def get_redis():
     if not redis_client:
         raise RuntimeError("Redis not initialized")
     return redis_client
+
+def pubsub():
+    """New PubSub on the dedicated subscription client"""
+    if not pubsub_client:
+        raise RuntimeError("Redis not initialized")
+    return pubsub_client.pubsub()
+
+async def execute(command: str, *args, **kwargs):
+    """Run one Redis command through the circuit breaker
+
+    Raises CircuitOpen while the circuit is open; errors and timeouts from
+    Redis are counted as failures and re-raised.
+    """
+    client = get_redis()
+    if not breaker.allow():
+        raise CircuitOpen("Redis circuit open")
+    try:
+        result = await getattr(client, command)(*args, **kwargs)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+async def _execute_pipeline(commands) -> list:
+    """Send (command, args, kwargs) triples in one round trip through the breaker"""
+    client = get_redis()
+    if not breaker.allow():
+        raise CircuitOpen("Redis circuit open")
+    try:
+        pipe = client.pipeline(transaction=False)
+        for command, args, kwargs in commands:
+            getattr(pipe, command)(*args, **kwargs)
+        result = await pipe.execute()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+async def mget(keys: list) -> list:
+    """Values for keys (None where missing) in a single MGET"""
+    if not keys:
+        return []
+    return await execute("mget", keys)
+
+async def mset(items, ex: int = None, pipeline_size: int = 500) -> int:
+    """SET every (key, value) pair with an optional TTL
+
+    MSET cannot set expiries, so the SETs are pipelined instead,
+    pipeline_size commands per round trip. Returns the number written.
+    """
+    items = list(items)
+    for start in range(0, len(items), pipeline_size):
+        await _execute_pipeline(
+            ("set", (key, value), {"ex": ex})
+            for key, value in items[start:start + pipeline_size]
+        )
+    return len(items)
@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+
+STARTUP_MODES = ("eager", "lazy")
+
+class StartupTimer:
+    """Wall time of each startup phase, from the first import of this module until ready
+
+    Import this module before anything heavy so the "imports" phase covers
+    the application's own import graph.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_mark = self.started
+        self.phases = {}
+        self.ready_seconds = None
+
+    def mark(self, phase: str):
+        """Record the time since the previous mark as phase"""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last_mark
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, phase: str):
+        """Record the wall time of a block as phase (may overlap other phases)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] = time.perf_counter() - started
+
+    def ready(self):
+        self.ready_seconds = time.perf_counter() - self.started
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready_seconds is not None,
+            "ready_ms": None if self.ready_seconds is None else round(self.ready_seconds * 1000, 1),
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+        }
+
+startup = StartupTimer()
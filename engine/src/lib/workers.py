@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker forked by src.serve; None when serving single-process
+identity = None
+
+def set_identity(index: int, generation: int):
+    global identity
+    identity = {"index": index, "generation": generation, "started_at": time.time()}
+
+def memory_kib() -> dict:
+    """Resident and proportional set size of this process (Linux /proc), in KiB
+
+    PSS splits shared pages between the processes mapping them, so summing it
+    over workers gives the real footprint of the whole pool.
+    """
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Shared_Clean", "Private_Dirty"):
+                    usage[name.lower()] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+def status_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"worker-{pid}.json")
+
+def write_status(directory: str, status: dict):
+    """Replace this worker's status file atomically"""
+    path = status_path(directory, os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(status, f)
+    os.replace(temporary, path)
+
+def read_status(directory: str, pid: int):
+    try:
+        with open(status_path(directory, pid)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def read_statuses(directory: str) -> list:
+    """Status of every worker that has reported, with the age of its last heartbeat"""
+    statuses = []
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return statuses
+    now = time.time()
+    for name in names:
+        if not (name.startswith("worker-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue
+        status["heartbeat_age_seconds"] = round(now - status["heartbeat"], 3)
+        statuses.append(status)
+    return statuses
+
+def remove_status(directory: str, pid: int):
+    try:
+        os.remove(status_path(directory, pid))
+    except OSError:
+        pass
+
+def current_status(extra: dict = None) -> dict:
+    return {
+        **identity,
+        "pid": os.getpid(),
+        "ready": True,
+        "heartbeat": time.time(),
+        "memory_kib": memory_kib(),
+        **(extra or {}),
+    }
+
+async def heartbeat(directory: str, interval: float, collect=None):
+    """Write this worker's status every interval seconds until cancelled
+
+    collect() may return extra fields (e.g. request counters) to include.
+    """
+    try:
+        while True:
+            try:
+                write_status(directory, current_status(collect() if collect else None))
+            except Exception as e:
+                logger.warning(f"Worker heartbeat failed: {e}")
+            await asyncio.sleep(interval)
+    finally:
+        remove_status(directory, os.getpid())
@@ -1,12 +1,26 @@
+from src.lib.startup import STARTUP_MODES, startup
+import asyncio
+import json
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from dotenv import load_dotenv
 import logging
 from contextlib import asynccontextmanager
-from src.routes import predictions, health
+from src.routes import predictions, health, metrics, admin
 from src.lib.redis_client import init_redis, close_redis
+from src.lib.config import settings
+from src.lib.executor import executor
+from src.lib.prediction_cache import prediction_cache
+from src.lib.precomputed import precomputed_predictions
+from src.lib.inplay_hub import inplay_hub
+from src.lib import workers
+from src.models.team_state import team_state
+from src.features.stats_store import stats_store
 from src.lib.logger import logger
+from src.models import tasks
+
+startup.mark("imports")
 
 load_dotenv()
 
@@ -14,13 +28,101 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if settings.STARTUP_MODE not in STARTUP_MODES:
+    raise ValueError(f"Unknown startup mode '{settings.STARTUP_MODE}', expected one of {STARTUP_MODES}")
+
+async def connect_redis():
+    with startup.phase("redis"):
+        await init_redis()
+
+async def prewarm_engine():
+    try:
+        with startup.phase("prewarm"):
+            await asyncio.to_thread(tasks.prewarm)
+    except Exception as e:
+        logger.warning(f"Engine prewarm failed: {e}")
+
+async def precompute_periodically():
+    """Re-score the upcoming fixtures file every PRECOMPUTE_INTERVAL seconds
+
+    Every worker runs this loop; a Redis lock held for the interval lets only
+    one of them re-score (and flip the version pointer) per interval.
+    """
+    while True:
+        try:
+            if (
+                os.path.exists(settings.PRECOMPUTE_FIXTURES_PATH)
+                and await precomputed_predictions.claim_refresh(settings.PRECOMPUTE_INTERVAL)
+            ):
+                with open(settings.PRECOMPUTE_FIXTURES_PATH) as f:
+                    fixtures = [predictions.MatchInput.model_validate(fixture) for fixture in json.load(f)]
+                await predictions.precompute_fixtures(fixtures)
+        except Exception as e:
+            logger.warning(f"Scheduled precompute failed: {e}")
+        await asyncio.sleep(settings.PRECOMPUTE_INTERVAL)
+
+async def refresh_team_state_periodically():
+    """Replay results other workers recorded, off the event loop, every TEAM_STATE_RELOAD_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(settings.TEAM_STATE_RELOAD_INTERVAL)
+        try:
+            await asyncio.to_thread(team_state.refresh)
+        except Exception as e:
+            logger.warning(f"Team state refresh failed: {e}")
+
+def worker_counters() -> dict:
+    """Per-worker load figures included in each heartbeat"""
+    return {
+        "executor": executor.stats(),
+        "cache": prediction_cache.stats(),
+    }
+
+async def run_in_background(coro, name: str):
+    try:
+        await coro
+    except Exception as e:
+        logger.warning(f"Background startup step '{name}' failed: {e}")
+
 # Lifespan events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("🚀 Starting Predictsports AI Engine")
-    await init_redis()
+    logger.info(f"🚀 Starting Predictsports AI Engine ({settings.STARTUP_MODE} startup)")
+    # Key cached payloads by the parameters this worker actually serves, so
+    # workers forked after a reload never read what the old ones computed
+    model_version = tasks.model_version()
+    prediction_cache.set_model_version(model_version)
+    precomputed_predictions.set_model_version(model_version)
+    background = []
+    if settings.STARTUP_MODE == "lazy":
+        # Serve as soon as possible: Redis and the engine warm-up finish in the
+        # background; until Redis is up the prediction cache computes locally
+        background.append(asyncio.create_task(run_in_background(connect_redis(), "redis")))
+        if settings.ENGINE_PREWARM:
+            background.append(asyncio.create_task(prewarm_engine()))
+    else:
+        await connect_redis()
+        if settings.ENGINE_PREWARM:
+            await prewarm_engine()
+    with startup.phase("team_state"):
+        team_state.load(settings.TEAM_STATE_PATH)
+    background.append(asyncio.create_task(refresh_team_state_periodically()))
+    with startup.phase("stats_store"):
+        stats_store.load(settings.STATS_STORE_PATH)
+    if settings.PRECOMPUTE_INTERVAL > 0:
+        background.append(asyncio.create_task(precompute_periodically()))
+    startup.ready()
+    if workers.identity is not None:
+        # Forked by src.serve: report readiness and health to the master
+        background.append(asyncio.create_task(workers.heartbeat(
+            settings.WORKER_STATUS_DIR, settings.WORKER_HEARTBEAT_INTERVAL, worker_counters
+        )))
+    logger.info(f"✅ Ready in {startup.report()['ready_ms']}ms {startup.report()['phases_ms']}")
     yield
     logger.info("🛑 Shutting down Predictsports AI Engine")
+    for task in background:
+        task.cancel()
+    executor.shutdown()
+    await inplay_hub.close()
     await close_redis()
 
 # Create FastAPI app
@@ -40,9 +142,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routes
 app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(metrics.router, tags=["metrics"])
 app.include_router(predictions.router, prefix="/predictions", tags=["predictions"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,264 @@
+"""
+Backtest Module
+Scores every ensemble member over a historical match set in one batch pass,
+then evaluates many candidate ensemble weightings against the results.
+
+Member probabilities are computed once; each weight vector only costs a few
+matrix products, so grids of thousands of weightings over 100k matches run
+in seconds to minutes. Search a grid and save the best configuration for the
+engine to load:
+
+    python -m src.models.backtest history.csv data/ensemble_weights.json --step 0.05 --workers 4
+"""
+import argparse
+import itertools
+import json
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Sequence
+import logging
+from src.models.ensemble import CONFIDENCE_THRESHOLDS, MATCH_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('home_win', 'draw', 'away_win')
+
+# Weight vectors evaluated together: bounds the (chunk, matches) temporaries
+CHUNK_SIZE = 16
+
+CALIBRATION_BINS = 10
+
+# Keeps log-loss finite when the ensemble gives an outcome zero probability
+EPSILON = 1e-12
+
+
+def outcome_index(home_goals, away_goals) -> np.ndarray:
+    """0 / 1 / 2 for home win / draw / away win, ordered like OUTCOMES"""
+    margin = np.sign(np.asarray(home_goals) - np.asarray(away_goals))
+    return (1 - margin).astype(np.int64)
+
+
+def member_probabilities(engine, matches) -> Dict[str, np.ndarray]:
+    """
+    Batch-run every ensemble member, returning name -> (3, N) probabilities
+    NaN (a member abstaining) becomes zero, which is how the ensemble treats it.
+    """
+    features = engine.engineer_features_batch(matches)
+    predictions = engine.run_models_batch(features)
+    return {
+        model: np.nan_to_num(np.stack([np.asarray(pred[outcome], dtype=float) for outcome in OUTCOMES]))
+        for model, pred in predictions.items()
+    }
+
+
+def weight_grid(n_models: int, step: float = 0.05) -> np.ndarray:
+    """All weight vectors on the simplex with the given step, shape (K, n_models)"""
+    units = int(round(1 / step))
+    # Stars and bars: choose n_models - 1 cut points among units + n_models - 1 slots
+    grid = []
+    for cuts in itertools.combinations(range(units + n_models - 1), n_models - 1):
+        bounds = (-1,) + cuts + (units + n_models - 1,)
+        grid.append([bounds[i + 1] - bounds[i] - 1 for i in range(n_models)])
+    return np.array(grid, dtype=float) / units
+
+
+def _score_chunk(weights: np.ndarray, probabilities: np.ndarray, actual: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """
+    Log-loss and Brier score for each weight vector
+    weights is (K, M); probabilities is (M, 3, N), actual and total are the
+    (M, N) member probability of the observed outcome and member row sums.
+    The ensemble is linear in the weights, so each term is a (K, M) @ (M, N)
+    product. Returns a (K, 2) array; a weighting that puts all its weight on
+    members abstaining for some match scores inf on both metrics.
+    """
+    ensemble_total = weights @ total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ensemble_actual = (weights @ actual) / ensemble_total
+        log_loss = -np.log(np.maximum(ensemble_actual, EPSILON)).mean(axis=1)
+
+        # sum_o (q_o - y_o)^2 = sum_o q_o^2 - 2 q_actual + 1
+        squares = sum((weights @ probabilities[:, i]) ** 2 for i in range(len(OUTCOMES)))
+        brier = (squares / ensemble_total ** 2 - 2 * ensemble_actual + 1).mean(axis=1)
+    scores = np.column_stack((log_loss, brier))
+    scores[(ensemble_total <= 0).any(axis=1)] = np.inf
+    return scores
+
+
+def evaluate_weights(
+    weights: np.ndarray,
+    probabilities: np.ndarray,
+    outcomes: np.ndarray,
+    n_workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    Log-loss and Brier score, shape (K, 2), for K weight vectors
+    Weight vectors are scored chunk_size at a time, spread over up to
+    n_workers processes.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    chunks = [weights[start:start + chunk_size] for start in range(0, len(weights), chunk_size)]
+    actual = probabilities[:, outcomes, np.arange(outcomes.size)]
+    total = probabilities.sum(axis=1)
+    shared = (probabilities, actual, total)
+
+    if n_workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(chunks))) as pool:
+            scores = list(pool.map(_score_chunk, chunks, *(itertools.repeat(array) for array in shared)))
+    else:
+        scores = [_score_chunk(chunk, *shared) for chunk in chunks]
+    return np.concatenate(scores)
+
+
+def calibration_curve(probabilities: np.ndarray, outcomes: np.ndarray, bins: int = CALIBRATION_BINS) -> Dict[str, dict]:
+    """
+    Reliability curve per outcome: mean predicted probability, observed
+    frequency and match count in each equal-width probability bin
+    probabilities is (3, N) ensemble output.
+    """
+    curves = {}
+    for i, outcome in enumerate(OUTCOMES):
+        predicted = probabilities[i]
+        observed = (outcomes == i).astype(float)
+        bin_index = np.minimum((predicted * bins).astype(np.int64), bins - 1)
+
+        counts = np.bincount(bin_index, minlength=bins)
+        occupied = counts > 0
+        safe_counts = np.maximum(counts, 1)
+        curves[outcome] = {
+            'mean_predicted': (np.bincount(bin_index, predicted, bins) / safe_counts)[occupied].tolist(),
+            'observed_frequency': (np.bincount(bin_index, observed, bins) / safe_counts)[occupied].tolist(),
+            'count': counts[occupied].tolist(),
+        }
+    return curves
+
+
+def confidence_report(engine, probabilities: np.ndarray, outcomes: np.ndarray) -> Dict[str, dict]:
+    """Match count and home-win hit rate for each confidence label the engine would assign"""
+    labels = engine.determine_confidence_batch(probabilities[0])
+    home_won = outcomes == 0
+    report = {}
+    for label in list(engine.confidence_thresholds) + ['low']:
+        selected = labels == label
+        count = int(selected.sum())
+        report[label] = {
+            'count': count,
+            'home_win_rate': float(home_won[selected].mean()) if count else None,
+        }
+    return report
+
+
+class Backtester:
+    """Historical evaluation of ensemble weightings"""
+
+    def __init__(self, engine, matches, home_goals, away_goals):
+        members = member_probabilities(engine, matches)
+        self.engine = engine
+        self.models: List[str] = list(members)
+        self.probabilities = np.stack([members[model] for model in self.models])
+        self.outcomes = outcome_index(home_goals, away_goals)
+
+    def __len__(self) -> int:
+        return self.outcomes.size
+
+    def weight_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        return np.array([weights.get(model, 0.0) for model in self.models])
+
+    def ensemble(self, weights: Dict[str, float]) -> np.ndarray:
+        """(3, N) ensemble probabilities for one weighting"""
+        combined = np.einsum('m,mon->on', self.weight_vector(weights), self.probabilities)
+        return combined / combined.sum(axis=0)
+
+    def evaluate(self, weights: Dict[str, float]) -> Dict[str, Any]:
+        """Log-loss, Brier score, calibration and confidence tiers for one weighting"""
+        log_loss, brier = evaluate_weights(self.weight_vector(weights), self.probabilities, self.outcomes)[0]
+        probabilities = self.ensemble(weights)
+        return {
+            'weights': dict(zip(self.models, self.weight_vector(weights).tolist())),
+            'log_loss': float(log_loss),
+            'brier': float(brier),
+            'calibration': calibration_curve(probabilities, self.outcomes),
+            'confidence': confidence_report(self.engine, probabilities, self.outcomes),
+        }
+
+    def search(
+        self,
+        step: float = 0.05,
+        n_workers: int = 1,
+        metric: str = 'log_loss',
+        candidates: Sequence = None,
+    ) -> Dict[str, Any]:
+        """
+        Score a simplex grid (or explicit candidate weight vectors ordered like
+        self.models) and report the best weighting alongside the current one
+        """
+        grid = weight_grid(len(self.models), step) if candidates is None else np.asarray(candidates, dtype=float)
+        scores = evaluate_weights(grid, self.probabilities, self.outcomes, n_workers)
+        metric_scores = scores[:, 0 if metric == 'log_loss' else 1]
+        if not np.isfinite(metric_scores).any():
+            raise ValueError("Every candidate weighting leaves some match without a contributing member")
+        best = int(np.argmin(metric_scores))
+
+        return {
+            'matches': len(self),
+            'candidates': len(grid),
+            'metric': metric,
+            'best': self.evaluate(dict(zip(self.models, grid[best]))),
+            'current': self.evaluate(self.engine.weights),
+        }
+
+
+def save_config(path: str, weights: Dict[str, float], confidence_thresholds: Dict[str, float] = None):
+    """Write weights/thresholds in the format PredictionEngine.load_ensemble_config reads"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(
+            {
+                'weights': weights,
+                'confidence_thresholds': confidence_thresholds or dict(CONFIDENCE_THRESHOLDS),
+            },
+            f,
+            indent=2,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the ensemble and search its weights")
+    parser.add_argument("history", help="CSV of match inputs (as sent to /predict) plus home_goals, away_goals")
+    parser.add_argument("output", nargs="?", help="write the best weights here as JSON")
+    parser.add_argument("--step", type=float, default=0.05, help="weight grid resolution")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--metric", choices=("log_loss", "brier"), default="log_loss")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    from src.models.tasks import engine
+
+    history = pd.read_csv(args.history)
+    inputs = [column for column in list(MATCH_DEFAULTS) + ['home_team_id', 'away_team_id'] if column in history]
+    # Missing cells become None so the engine applies its per-match defaults
+    matches = {
+        column: history[column].astype(object).where(history[column].notna(), None).tolist()
+        for column in inputs
+    }
+
+    backtester = Backtester(engine, matches, history["home_goals"].to_numpy(), history["away_goals"].to_numpy())
+    result = backtester.search(args.step, args.workers, args.metric)
+
+    for name in ("current", "best"):
+        print(f"{name:>8}: log_loss={result[name]['log_loss']:.4f} brier={result[name]['brier']:.4f} "
+              f"weights={json.dumps(result[name]['weights'])}")
+    print(f"{result['candidates']} weightings over {result['matches']} matches")
+
+    if args.output:
+        save_config(args.output, result["best"]["weights"], engine.confidence_thresholds)
+        print(f"Best weights written to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
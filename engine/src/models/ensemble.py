@@ -1,9 +1,86 @@
+import hashlib
+import json
 import numpy as np
-from scipy.stats import poisson
+import os
 import logging
+from src.lib.metrics import ENGINE_MODEL_SECONDS, ENGINE_STAGE_SECONDS
+from src.models.score_matrix import ScoreMatrix
 
 logger = logging.getLogger(__name__)
 
+# Defaults applied to any match field the caller leaves out
+MATCH_DEFAULTS = {
+    'home_form': 'WWW',
+    'away_form': 'WWW',
+    'home_xg': 1.5,
+    'away_xg': 1.2,
+    'home_possession': 50,
+    'away_possession': 50,
+    'home_defensive_rating': 0.75,
+    'away_defensive_rating': 0.75,
+    'is_home_advantage': True,
+}
+
+ENSEMBLE_WEIGHTS = {
+    'poisson': 0.30,
+    'logistic': 0.25,
+    'form': 0.20,
+    'tactical': 0.15,
+    'market': 0.10,
+}
+
+# Confidence label for the first threshold the home win probability exceeds
+CONFIDENCE_THRESHOLDS = {
+    'very_high': 0.65,
+    'high': 0.55,
+    'medium': 0.48,
+}
+
+# Closed-form members cheap enough for the fast tier (no score matrix)
+FAST_MODELS = ('logistic', 'form', 'tactical', 'market')
+
+# fast: FAST_MODELS only; full: every member plus scorelines and markets;
+# auto: fast, escalating to full when the fast members disagree
+TIERS = ('fast', 'full', 'auto')
+
+# The auto tier escalates below this calculate_agreement score
+ESCALATION_AGREEMENT = 0.85
+
+# What-if steps for sensitivity analysis: each factor shifts these feature
+# columns together, one step up and one step down (possession moves between
+# the sides); home advantage is toggled instead
+SENSITIVITY_STEPS = {
+    'home_xg': {'home_xg': 0.25},
+    'away_xg': {'away_xg': 0.25},
+    'possession': {'home_possession': 5.0, 'away_possession': -5.0},
+    'home_defensive_rating': {'home_defensive_rating': 0.05},
+    'away_defensive_rating': {'away_defensive_rating': 0.05},
+    'home_form': {'home_strength': 0.1},
+    'away_form': {'away_strength': 0.1},
+}
+
+# Valid range of each perturbed column; shifted values are clipped into it
+SENSITIVITY_BOUNDS = {
+    'home_xg': (0.05, None),
+    'away_xg': (0.05, None),
+    'home_possession': (0.0, 100.0),
+    'away_possession': (0.0, 100.0),
+    'home_defensive_rating': (0.0, 1.0),
+    'away_defensive_rating': (0.0, 1.0),
+    'home_strength': (0.0, 1.0),
+    'away_strength': (0.0, 1.0),
+}
+
+_STAGE_TIMERS = {
+    (stage, mode): ENGINE_STAGE_SECONDS.labels(stage=stage, mode=mode)
+    for stage in ('feature_engineering', 'score_matrix', 'ensemble', 'scorelines', 'goal_markets')
+    for mode in ('single', 'batch')
+}
+
+def _mode(features: dict) -> str:
+    """Metric label for whether features describe one match or a batch"""
+    return 'batch' if np.ndim(features['home_xg']) else 'single'
+
 class PredictionEngine:
     """Ensemble prediction model combining multiple algorithms"""
     
@@ -15,6 +92,103 @@ class PredictionEngine:
             'tactical': self.tactical_model,
             'market': self.market_model,
         }
+        self.batch_models = {
+            'poisson': self.poisson_model_batch,
+            'logistic': self.logistic_model_batch,
+            'form': self.form_model_batch,
+            'tactical': self.tactical_model_batch,
+            'market': self.market_model_batch,
+        }
+        self.model_timers = {
+            (model_name, mode): ENGINE_MODEL_SECONDS.labels(model=model_name, mode=mode)
+            for model_name in self.models
+            for mode in ('single', 'batch')
+        }
+        self.weights = dict(ENSEMBLE_WEIGHTS)
+        self.confidence_thresholds = dict(CONFIDENCE_THRESHOLDS)
+        self.escalation_agreement = ESCALATION_AGREEMENT
+        self.dixon_coles = None
+    
+    def configure(
+        self,
+        weights: dict = None,
+        confidence_thresholds: dict = None,
+        escalation_agreement: float = None,
+    ):
+        """Override ensemble weights, confidence thresholds or the auto-tier escalation point"""
+        
+        if weights is not None:
+            unknown = set(weights) - set(self.weights)
+            if unknown:
+                raise ValueError(f"Unknown ensemble members: {sorted(unknown)}")
+            self.weights.update(weights)
+        if confidence_thresholds is not None:
+            self.confidence_thresholds = dict(
+                sorted(confidence_thresholds.items(), key=lambda item: -item[1])
+            )
+        if escalation_agreement is not None:
+            self.escalation_agreement = escalation_agreement
+    
+    def load_ensemble_config(self, path: str) -> bool:
+        """Apply weights/thresholds saved by the backtester; returns False when there is no file"""
+        
+        if not os.path.exists(path):
+            return False
+        
+        with open(path) as f:
+            config = json.load(f)
+        # Members that are not loaded (e.g. no Dixon-Coles ratings) keep no weight
+        weights = {
+            model: weight for model, weight in config.get('weights', {}).items()
+            if model in self.weights
+        }
+        self.configure(weights, config.get('confidence_thresholds'))
+        logger.info(f"✅ Ensemble config loaded from {path}")
+        return True
+    
+    def fingerprint(self) -> str:
+        """Short hash of every loaded parameter that shapes predictions
+        
+        Cached payloads are keyed by it, so none computed before a parameter
+        reload is served after it.
+        """
+        
+        digest = hashlib.sha256(json.dumps({
+            'weights': self.weights,
+            'confidence_thresholds': self.confidence_thresholds,
+            'escalation_agreement': self.escalation_agreement,
+        }, sort_keys=True).encode())
+        if self.dixon_coles is not None:
+            model = self.dixon_coles
+            for values in (
+                model.team_ids, model.attack, model.defence,
+                (model.home_advantage, model.intercept, model.rho),
+            ):
+                digest.update(np.asarray(values, dtype=float).tobytes())
+        return digest.hexdigest()[:12]
+    
+    def attach_dixon_coles(self, model, weight: float):
+        """Add a fitted DixonColesModel as an ensemble member with the given weight"""
+        
+        self.dixon_coles = model
+        self.models['dixon_coles'] = self.dixon_coles_model
+        self.batch_models['dixon_coles'] = self.dixon_coles_model_batch
+        for mode in ('single', 'batch'):
+            self.model_timers['dixon_coles', mode] = ENGINE_MODEL_SECONDS.labels(model='dixon_coles', mode=mode)
+        self.weights['dixon_coles'] = weight
+    
+    def load_dixon_coles(self, path: str, weight: float) -> bool:
+        """Attach Dixon-Coles parameters saved at path; returns False when there is no file"""
+        
+        if not os.path.exists(path):
+            return False
+        
+        from src.models.dixon_coles import DixonColesModel
+        
+        model = DixonColesModel.load(path)
+        self.attach_dixon_coles(model, weight)
+        logger.info(f"✅ Dixon-Coles model loaded ({model.team_ids.size} teams)")
+        return True
     
     def predict_match(self, match_data: dict) -> dict:
         """Generate ensemble predictions for a match"""
@@ -23,25 +197,102 @@ class PredictionEngine:
         features = self.engineer_features(match_data)
         
         # Run all models
-        predictions = {}
-        for model_name, model_fn in self.models.items():
-            predictions[model_name] = model_fn(features)
+        predictions = self.run_models(features)
         
         # Ensemble: weighted average
-        ensemble_prediction = self.ensemble_predictions(predictions)
+        with _STAGE_TIMERS['ensemble', 'single'].time():
+            ensemble_prediction = self.ensemble_predictions(predictions)
         
         return ensemble_prediction
     
+    def predict_batch(self, match_data, tier: str = 'full') -> dict:
+        """Generate ensemble predictions for N matches in one vectorized pass
+        
+        Accepts either a list of match dicts or a dict of equal-length columns
+        (lists or arrays) keyed like a single match dict. Returns a dict of
+        arrays, one entry per match, with the same keys as predict_match.
+        With tier='fast' only FAST_MODELS run; tier='auto' then re-runs the
+        remaining members for the matches whose fast members disagree and
+        adds a boolean 'escalated' array.
+        """
+        
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier '{tier}', expected one of {TIERS}")
+        
+        features = self.engineer_features_batch(match_data)
+        predictions = self.run_models_batch(features, FAST_MODELS if tier != 'full' else None)
+        
+        with _STAGE_TIMERS['ensemble', 'batch'].time():
+            result = self.ensemble_predictions_batch(predictions)
+        if tier != 'auto':
+            return result
+        
+        escalated = result['model_agreement'] < self.escalation_agreement
+        if escalated.any():
+            rows = np.flatnonzero(escalated)
+            subset = self._take_rows(features, rows)
+            full_predictions = {
+                model_name: {outcome: values[rows] for outcome, values in prediction.items()}
+                for model_name, prediction in predictions.items()
+            }
+            full_predictions.update(
+                self.run_models_batch(subset, [name for name in self.batch_models if name not in predictions])
+            )
+            with _STAGE_TIMERS['ensemble', 'batch'].time():
+                full = self.ensemble_predictions_batch(full_predictions)
+            for key, values in full.items():
+                result[key][rows] = values
+        
+        result['escalated'] = escalated
+        return result
+    
+    def _take_rows(self, features: dict, rows: np.ndarray) -> dict:
+        """Batch features restricted to the given rows"""
+        
+        return {
+            name: None if values is None else np.asarray(values)[rows]
+            for name, values in features.items()
+            if name != 'score_matrix'
+        }
+    
+    def run_models(self, features: dict, model_names=None) -> dict:
+        """Run every ensemble member (or just model_names) on one match, timing each"""
+        
+        predictions = {}
+        for model_name in self.models if model_names is None else model_names:
+            with self.model_timers[model_name, 'single'].time():
+                predictions[model_name] = self.models[model_name](features)
+        return predictions
+    
+    def run_models_batch(self, features: dict, model_names=None) -> dict:
+        """Run every vectorized ensemble member (or just model_names) on a batch, timing each"""
+        
+        predictions = {}
+        for model_name in self.batch_models if model_names is None else model_names:
+            with self.model_timers[model_name, 'batch'].time():
+                predictions[model_name] = self.batch_models[model_name](features)
+        return predictions
+    
     def engineer_features(self, match_data: dict) -> dict:
         """Feature engineering from raw match data"""
         
-        home_form = match_data.get('home_form', 'WWW')
-        away_form = match_data.get('away_form', 'WWW')
+        with _STAGE_TIMERS['feature_engineering', 'single'].time():
+            return self._engineer_features(match_data)
+    
+    def _engineer_features(self, match_data: dict) -> dict:
+        # A precomputed strength (e.g. from server-side team state) wins over
+        # parsing the form string
+        home_strength = match_data.get('home_strength')
+        if home_strength is None:
+            home_strength = self.calculate_form_index(self._form(match_data, 'home_form'))
         
-        home_strength = self.calculate_form_index(home_form)
-        away_strength = self.calculate_form_index(away_form)
+        away_strength = match_data.get('away_strength')
+        if away_strength is None:
+            away_strength = self.calculate_form_index(self._form(match_data, 'away_form'))
         
         return {
+            'home_team_id': match_data.get('home_team_id'),
+            'away_team_id': match_data.get('away_team_id'),
             'home_strength': home_strength,
             'away_strength': away_strength,
             'home_xg': match_data.get('home_xg', 1.5),
@@ -53,6 +304,58 @@ class PredictionEngine:
             'is_home_advantage': match_data.get('is_home_advantage', True),
         }
     
+    def engineer_features_batch(self, match_data) -> dict:
+        """Columnar feature engineering for a batch of matches"""
+        
+        with _STAGE_TIMERS['feature_engineering', 'batch'].time():
+            return self._engineer_features_batch(match_data)
+    
+    def _engineer_features_batch(self, match_data) -> dict:
+        if isinstance(match_data, (list, tuple)):
+            columns = list(MATCH_DEFAULTS) + ['home_strength', 'away_strength', 'home_team_id', 'away_team_id']
+            match_data = {
+                column: [match.get(column) for match in match_data]
+                for column in columns
+            }
+        
+        size = len(next(iter(match_data.values()))) if match_data else 0
+        
+        def column(name, dtype=float):
+            values = match_data.get(name)
+            if values is None:
+                return np.full(size, MATCH_DEFAULTS[name], dtype=dtype)
+            values = np.asarray(values, dtype=object if dtype is not float else None)
+            if values.dtype == object:
+                # Per-match gaps (None) take the default, like the scalar path
+                values = np.where(values == None, MATCH_DEFAULTS[name], values)  # noqa: E711
+            return values.astype(dtype)
+        
+        def strength(side):
+            form_strength = self.calculate_form_index_batch(column(f'{side}_form', str))
+            precomputed = match_data.get(f'{side}_strength')
+            if precomputed is None:
+                return form_strength
+            precomputed = np.asarray(precomputed, dtype=float)
+            return np.where(np.isnan(precomputed), form_strength, precomputed)
+        
+        return {
+            'home_team_id': match_data.get('home_team_id'),
+            'away_team_id': match_data.get('away_team_id'),
+            'home_strength': strength('home'),
+            'away_strength': strength('away'),
+            'home_xg': column('home_xg'),
+            'away_xg': column('away_xg'),
+            'home_possession': column('home_possession'),
+            'away_possession': column('away_possession'),
+            'home_defensive_rating': column('home_defensive_rating'),
+            'away_defensive_rating': column('away_defensive_rating'),
+            'is_home_advantage': column('is_home_advantage', bool),
+        }
+    
+    def _form(self, match_data: dict, key: str) -> str:
+        form = match_data.get(key)
+        return MATCH_DEFAULTS[key] if form is None else form
+    
     def calculate_form_index(self, form_string: str) -> float:
         """Calculate team form index (0-1)"""
         if not form_string:
@@ -62,27 +365,32 @@ class PredictionEngine:
         scores = [weights.get(result, 0.5) for result in form_string]
         return np.mean(scores) if scores else 0.5
     
-    def poisson_model(self, features: dict) -> dict:
-        """Poisson goal distribution model"""
+    def calculate_form_index_batch(self, form_strings: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_form_index over an array of form strings"""
         
-        home_lambda = features['home_strength'] * features['home_xg']
-        away_lambda = features['away_strength'] * features['away_xg']
+        length = np.char.str_len(form_strings)
+        wins = np.char.count(form_strings, 'W')
+        losses = np.char.count(form_strings, 'L')
         
-        # Calculate probabilities for 0-5 goals
-        home_probs = [poisson.pmf(i, home_lambda) for i in range(6)]
-        away_probs = [poisson.pmf(i, away_lambda) for i in range(6)]
+        # Anything other than W/L scores 0.5, matching the scalar weights
+        scores = wins + 0.5 * (length - wins - losses)
+        return np.where(length > 0, scores / np.maximum(length, 1), 0.5)
+    
+    def poisson_model(self, features: dict) -> dict:
+        """Poisson goal distribution model"""
         
-        # Match outcomes
-        home_win = sum(home_probs[i] * sum(away_probs[:i]) for i in range(1, 6))
-        away_win = sum(away_probs[i] * sum(home_probs[:i]) for i in range(1, 6))
-        draw = sum(home_probs[i] * away_probs[i] for i in range(6))
+        outcomes = self.score_matrix(features).outcome_probabilities()
         
         return {
-            'home_win': float(home_win),
-            'draw': float(draw),
-            'away_win': float(away_win),
+            'home_win': float(outcomes['home_win'][0]),
+            'draw': float(outcomes['draw'][0]),
+            'away_win': float(outcomes['away_win'][0]),
         }
     
+    def poisson_model_batch(self, features: dict) -> dict:
+        """Vectorized poisson_model"""
+        return self.score_matrix(features).outcome_probabilities()
+    
     def logistic_model(self, features: dict) -> dict:
         """Logistic regression model"""
         
@@ -105,6 +413,26 @@ class PredictionEngine:
             'away_win': float(prob_away / total),
         }
     
+    def logistic_model_batch(self, features: dict) -> dict:
+        """Vectorized logistic_model"""
+        
+        strength_diff = features['home_strength'] - features['away_strength']
+        home_advantage_boost = np.where(features['is_home_advantage'], 0.3, 0.0)
+        
+        z = strength_diff + home_advantage_boost
+        
+        prob_home = 1 / (1 + np.exp(-z))
+        prob_away = 1 - prob_home
+        prob_draw = 0.25 * (1 - np.abs(strength_diff))
+        
+        total = prob_home + prob_draw + prob_away
+        
+        return {
+            'home_win': prob_home / total,
+            'draw': prob_draw / total,
+            'away_win': prob_away / total,
+        }
+    
     def form_model(self, features: dict) -> dict:
         """Form-based model"""
         
@@ -117,6 +445,17 @@ class PredictionEngine:
             'away_win': float(0.25 - (home_strength - away_strength) * 0.3),
         }
     
+    def form_model_batch(self, features: dict) -> dict:
+        """Vectorized form_model"""
+        
+        strength_diff = features['home_strength'] - features['away_strength']
+        
+        return {
+            'home_win': 0.5 + strength_diff * 0.3,
+            'draw': np.full_like(strength_diff, 0.25),
+            'away_win': 0.25 - strength_diff * 0.3,
+        }
+    
     def tactical_model(self, features: dict) -> dict:
         """Tactical matchup model"""
         
@@ -134,6 +473,20 @@ class PredictionEngine:
             'away_win': float(away_prob * 0.65),
         }
     
+    def tactical_model_batch(self, features: dict) -> dict:
+        """Vectorized tactical_model"""
+        
+        home_tactical = features['home_possession'] / 100 + features['home_xg'] / 3
+        away_tactical = features['away_possession'] / 100 + features['away_xg'] / 3
+        
+        total = home_tactical + away_tactical
+        
+        return {
+            'home_win': home_tactical / total * 0.65,
+            'draw': np.full_like(total, 0.25),
+            'away_win': away_tactical / total * 0.65,
+        }
+    
     def market_model(self, features: dict) -> dict:
         """Market-based model using odds and rating differences"""
         
@@ -150,16 +503,67 @@ class PredictionEngine:
             'away_win': float(np.clip(market_away, 0.1, 0.7)),
         }
     
+    def market_model_batch(self, features: dict) -> dict:
+        """Vectorized market_model"""
+        
+        rating_diff = features['home_strength'] - features['away_strength']
+        home_advantage = np.where(features['is_home_advantage'], 0.15, 0.0)
+        
+        market_home = 0.5 + rating_diff * 0.25 + home_advantage
+        market_away = 1 - market_home - 0.25
+        
+        return {
+            'home_win': np.clip(market_home, 0.1, 0.7),
+            'draw': np.full_like(market_home, 0.25),
+            'away_win': np.clip(market_away, 0.1, 0.7),
+        }
+    
+    def dixon_coles_model(self, features: dict):
+        """Dixon-Coles model from fitted team ratings; None (abstains) for unknown teams"""
+        
+        home_team_id = features['home_team_id']
+        away_team_id = features['away_team_id']
+        if home_team_id is None or away_team_id is None:
+            return None
+        
+        outcomes = self.dixon_coles_model_batch({
+            'home_team_id': [home_team_id],
+            'away_team_id': [away_team_id],
+        })
+        if np.isnan(outcomes['home_win'][0]):
+            return None
+        
+        return {
+            'home_win': float(outcomes['home_win'][0]),
+            'draw': float(outcomes['draw'][0]),
+            'away_win': float(outcomes['away_win'][0]),
+        }
+    
+    def dixon_coles_model_batch(self, features: dict) -> dict:
+        """Vectorized dixon_coles_model; NaN rows where a team has no fitted rating"""
+        
+        home_team_ids = features['home_team_id']
+        away_team_ids = features['away_team_id']
+        if home_team_ids is None or away_team_ids is None:
+            size = len(features['home_strength'])
+            return {outcome: np.full(size, np.nan) for outcome in ('home_win', 'draw', 'away_win')}
+        
+        home_lambda, away_lambda = self.dixon_coles.expected_goals(home_team_ids, away_team_ids)
+        outcomes = ScoreMatrix(home_lambda, away_lambda, rho=self.dixon_coles.rho).outcome_probabilities()
+        
+        known = ~np.isnan(home_lambda)
+        return {outcome: np.where(known, probs, np.nan) for outcome, probs in outcomes.items()}
+    
     def ensemble_predictions(self, predictions: dict) -> dict:
         """Combine predictions using weighted ensemble"""
         
-        weights = {
-            'poisson': 0.30,
-            'logistic': 0.25,
-            'form': 0.20,
-            'tactical': 0.15,
-            'market': 0.10,
-        }
+        weights = self.weights
+        # Members that abstain (None) drop out; normalization rescales the rest
+        predictions = {model: pred for model, pred in predictions.items() if pred is not None}
+        
+        if not any(weights.get(model, 0) > 0 for model in predictions):
+            # Only zero-weighted members predicted: blend them equally rather than divide by zero
+            weights = dict.fromkeys(predictions, 1.0)
         
         home_win = sum(predictions[model]['home_win'] * weights[model] for model in weights if model in predictions)
         draw = sum(predictions[model]['draw'] * weights[model] for model in weights if model in predictions)
@@ -176,6 +580,42 @@ class PredictionEngine:
             'confidence': self.determine_confidence(home_win / total),
         }
     
+    def ensemble_predictions_batch(self, predictions: dict) -> dict:
+        """Vectorized ensemble_predictions over per-model arrays"""
+        
+        weights = self.weights
+        
+        # NaN marks a member abstaining for that match, contributing nothing
+        def weighted(outcome, weights):
+            return sum(
+                np.nan_to_num(predictions[model][outcome]) * weights[model]
+                for model in weights if model in predictions
+            )
+        
+        home_win = weighted('home_win', weights)
+        draw = weighted('draw', weights)
+        away_win = weighted('away_win', weights)
+        
+        total = home_win + draw + away_win
+        
+        # Matches where every weighted member abstained fall back to an equal
+        # blend of the members that did predict
+        empty = total <= 0
+        if np.any(empty):
+            equal = dict.fromkeys(predictions, 1.0)
+            home_win = np.where(empty, weighted('home_win', equal), home_win)
+            draw = np.where(empty, weighted('draw', equal), draw)
+            away_win = np.where(empty, weighted('away_win', equal), away_win)
+            total = home_win + draw + away_win
+        
+        return {
+            'home_win': home_win / total,
+            'draw': draw / total,
+            'away_win': away_win / total,
+            'model_agreement': self.calculate_agreement_batch(predictions),
+            'confidence': self.determine_confidence_batch(home_win / total),
+        }
+    
     def calculate_agreement(self, predictions: dict) -> float:
         """Calculate how much models agree"""
         
@@ -183,32 +623,179 @@ class PredictionEngine:
         agreement = 1 - np.std(home_wins)
         return float(np.clip(agreement, 0, 1))
     
+    def calculate_agreement_batch(self, predictions: dict) -> np.ndarray:
+        """Vectorized calculate_agreement"""
+        
+        home_wins = np.stack([pred['home_win'] for pred in predictions.values()])
+        agreement = 1 - np.nanstd(home_wins, axis=0)
+        return np.clip(agreement, 0, 1)
+    
     def determine_confidence(self, max_prob: float) -> str:
         """Determine confidence level"""
-        if max_prob > 0.65:
-            return 'very_high'
-        elif max_prob > 0.55:
-            return 'high'
-        elif max_prob > 0.48:
-            return 'medium'
-        else:
-            return 'low'
+        for level, threshold in self.confidence_thresholds.items():
+            if max_prob > threshold:
+                return level
+        return 'low'
     
-    def generate_scorelines(self, features: dict, top_n: int = 5) -> list:
-        """Generate likely scorelines"""
+    def determine_confidence_batch(self, max_prob: np.ndarray) -> np.ndarray:
+        """Vectorized determine_confidence"""
+        return np.select(
+            [max_prob > threshold for threshold in self.confidence_thresholds.values()],
+            list(self.confidence_thresholds),
+            default='low',
+        )
+    
+    def expected_goals(self, features: dict) -> tuple:
+        """Poisson goal expectations (home_lambda, away_lambda)"""
         
         home_lambda = features['home_strength'] * features['home_xg']
         away_lambda = features['away_strength'] * features['away_xg']
+        return home_lambda, away_lambda
+    
+    def score_matrix(self, features: dict) -> ScoreMatrix:
+        """Joint goal distribution for the match(es), built once per features dict"""
+        
+        if 'score_matrix' not in features:
+            with _STAGE_TIMERS['score_matrix', _mode(features)].time():
+                features['score_matrix'] = ScoreMatrix(*self.expected_goals(features))
+        
+        return features['score_matrix']
+    
+    def generate_scorelines(self, features: dict, top_n: int = 5) -> list:
+        """Generate likely scorelines"""
+        
+        matrix = self.score_matrix(features)
+        with _STAGE_TIMERS['scorelines', 'single'].time():
+            return matrix.scorelines(top_n)[0]
+    
+    def goal_markets(self, features: dict) -> dict:
+        """Over/under, both-teams-to-score and handicap probabilities"""
+        
+        matrix = self.score_matrix(features)
+        with _STAGE_TIMERS['goal_markets', 'single'].time():
+            return matrix.goal_markets()[0]
+    
+    def predict_full(self, match_data: dict, top_n: int = 5) -> dict:
+        """Probabilities, scorelines and goal markets from one shared score matrix"""
+        
+        features = self.engineer_features(match_data)
+        predictions = self.run_models(features)
         
-        scorelines = []
-        for home_score in range(6):
-            for away_score in range(6):
-                prob = poisson.pmf(home_score, home_lambda) * poisson.pmf(away_score, away_lambda)
-                scorelines.append({
-                    'score': f'{home_score}-{away_score}',
-                    'probability': float(prob)
-                })
-        
-        # Sort by probability and return top N
-        scorelines.sort(key=lambda x: x['probability'], reverse=True)
-        return scorelines[:top_n]
+        with _STAGE_TIMERS['ensemble', 'single'].time():
+            probabilities = self.ensemble_predictions(predictions)
+        
+        return {
+            'probabilities': probabilities,
+            'scorelines': self.generate_scorelines(features, top_n),
+            'goal_markets': self.goal_markets(features),
+        }
+    
+    def predict_tiered(self, match_data: dict, tier: str = 'full', top_n: int = 5) -> dict:
+        """
+        predict_full at a chosen cost tier
+        fast returns FAST_MODELS probabilities only; auto starts there and
+        escalates to the full payload when their agreement falls below
+        escalation_agreement. 'tier' in the result says which one ran.
+        """
+        
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier '{tier}', expected one of {TIERS}")
+        if tier == 'full':
+            return dict(self.predict_full(match_data, top_n), tier='full')
+        
+        features = self.engineer_features(match_data)
+        predictions = self.run_models(features, FAST_MODELS)
+        
+        with _STAGE_TIMERS['ensemble', 'single'].time():
+            probabilities = self.ensemble_predictions(predictions)
+        if tier == 'fast' or probabilities['model_agreement'] >= self.escalation_agreement:
+            return {'probabilities': probabilities, 'tier': 'fast'}
+        
+        # Escalate: only the members the fast tier skipped still need to run
+        predictions.update(self.run_models(features, [name for name in self.models if name not in predictions]))
+        with _STAGE_TIMERS['ensemble', 'single'].time():
+            probabilities = self.ensemble_predictions(predictions)
+        
+        return {
+            'probabilities': probabilities,
+            'scorelines': self.generate_scorelines(features, top_n),
+            'goal_markets': self.goal_markets(features),
+            'tier': 'full',
+        }
+    
+    def predict_full_batch(self, match_data, top_n: int = 5) -> list:
+        """predict_full for N matches in one vectorized pass, one payload per match"""
+        
+        features = self.engineer_features_batch(match_data)
+        predictions = self.run_models_batch(features)
+        
+        with _STAGE_TIMERS['ensemble', 'batch'].time():
+            ensemble = self.ensemble_predictions_batch(predictions)
+            keys = list(ensemble)
+            probabilities = [
+                dict(zip(keys, values))
+                for values in zip(*(ensemble[key].tolist() for key in keys))
+            ]
+        
+        matrix = self.score_matrix(features)
+        with _STAGE_TIMERS['scorelines', 'batch'].time():
+            scorelines = matrix.scorelines(top_n)
+        with _STAGE_TIMERS['goal_markets', 'batch'].time():
+            goal_markets = matrix.goal_markets()
+        
+        return [
+            {
+                'probabilities': match_probabilities,
+                'scorelines': scorelines,
+                'goal_markets': goal_markets,
+            }
+            for match_probabilities, scorelines, goal_markets in zip(
+                probabilities, scorelines, goal_markets
+            )
+        ]
+    
+    def sensitivity(self, match_data: dict, tier: str = 'full') -> dict:
+        """
+        What-if analysis of one match in a single vectorized pass
+        Builds one batch row per SENSITIVITY_STEPS scenario (plus the base
+        match and a home advantage toggle), runs them through predict_batch
+        together and reports each factor's probability deltas against the
+        base row, ranked by the largest absolute delta.
+        """
+        
+        features = self.engineer_features(match_data)
+        base = {name: features[name] for name in SENSITIVITY_BOUNDS}
+        base['is_home_advantage'] = bool(features['is_home_advantage'])
+        
+        # (factor, change, full feature row) per scenario; row 0 is the base match
+        scenarios = [(None, {}, base)]
+        for factor, steps in SENSITIVITY_STEPS.items():
+            for direction in (1.0, -1.0):
+                row = dict(base)
+                for name, step in steps.items():
+                    low, high = SENSITIVITY_BOUNDS[name]
+                    row[name] = float(np.clip(base[name] + direction * step, low, high))
+                scenarios.append((factor, {name: round(row[name] - base[name], 6) for name in steps}, row))
+        toggled = not base['is_home_advantage']
+        scenarios.append(('home_advantage', {'is_home_advantage': toggled}, dict(base, is_home_advantage=toggled)))
+        
+        columns = {name: [row[name] for _, _, row in scenarios] for name in base}
+        for name in ('home_team_id', 'away_team_id'):
+            if features[name] is not None:
+                columns[name] = [features[name]] * len(scenarios)
+        
+        result = self.predict_batch(columns, tier)
+        outcomes = ('home_win', 'draw', 'away_win')
+        baseline = {outcome: float(result[outcome][0]) for outcome in outcomes}
+        
+        factors = {}
+        for row, (factor, changes, _) in enumerate(scenarios[1:], start=1):
+            delta = {outcome: float(result[outcome][row]) - baseline[outcome] for outcome in outcomes}
+            entry = factors.setdefault(factor, {'factor': factor, 'scenarios': [], 'impact': 0.0})
+            entry['scenarios'].append({'change': changes, 'delta': delta})
+            entry['impact'] = max(entry['impact'], max(abs(value) for value in delta.values()))
+        
+        return {
+            'baseline': baseline,
+            'factors': sorted(factors.values(), key=lambda entry: entry['impact'], reverse=True),
+        }
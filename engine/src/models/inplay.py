@@ -0,0 +1,112 @@
+"""
+In-Play Module
+Live probabilities conditioned on the elapsed time and current score.
+Goals still to come are Poisson with the pre-match lambdas scaled by the
+fraction of the match remaining; final outcomes shift that distribution by
+the current score.
+"""
+import numpy as np
+from typing import Dict, Optional
+import logging
+from src.models.score_matrix import OVER_UNDER_LINES, ScoreMatrix
+
+logger = logging.getLogger(__name__)
+
+MATCH_MINUTES = 90
+
+
+def remaining_fraction(minute: float) -> float:
+    """Share of the full-match goal expectation still to be played"""
+    return max(MATCH_MINUTES - minute, 0.0) / MATCH_MINUTES
+
+
+class InPlayMatch:
+    """
+    One live match
+    Built once from the pre-match goal expectations; every update only
+    rescales them and builds a small remaining-goals matrix. The latest
+    update is kept so repeated events for the same minute and score are free.
+    """
+
+    def __init__(self, match_id: str, home_lambda: float, away_lambda: float, pre_match: Optional[dict] = None):
+        self.match_id = match_id
+        self.home_lambda = float(home_lambda)
+        self.away_lambda = float(away_lambda)
+        self.pre_match = pre_match
+        self.revision = 0
+        self._last_key = None
+        self._last_state = None
+
+    def to_dict(self) -> dict:
+        """Pre-match state, enough to rebuild the match in another worker"""
+        return {
+            "match_id": self.match_id,
+            "home_lambda": self.home_lambda,
+            "away_lambda": self.away_lambda,
+            "pre_match": self.pre_match,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "InPlayMatch":
+        return cls(data["match_id"], data["home_lambda"], data["away_lambda"], data.get("pre_match"))
+
+    def update(self, minute: float, home_goals: int, away_goals: int, top_n: int = 5) -> Dict:
+        """Probabilities, likely final scores and goal markets at minute with the given score"""
+        key = (minute, home_goals, away_goals)
+        if key == self._last_key:
+            return self._last_state
+
+        fraction = remaining_fraction(minute)
+        remaining = ScoreMatrix(self.home_lambda * fraction, self.away_lambda * fraction)
+        max_goals = remaining.max_goals
+
+        # Final margin = current lead + margin of the goals still to come
+        difference = remaining.goal_difference()[0]
+        final_margin = np.arange(-max_goals, max_goals + 1) + (home_goals - away_goals)
+
+        # Final total = goals so far + remaining goals
+        remaining_total = np.cumsum(remaining.total_goals()[0])
+        goals_so_far = home_goals + away_goals
+
+        def over(line: float) -> float:
+            needed = int(np.floor(line)) - goals_so_far
+            if needed < 0:
+                return 1.0
+            return float(1.0 - remaining_total[min(needed, remaining_total.size - 1)])
+
+        home_scores = 1.0 if home_goals else 1.0 - float(remaining.home_pmf[0, 0])
+        away_scores = 1.0 if away_goals else 1.0 - float(remaining.away_pmf[0, 0])
+
+        home_extra, away_extra, probs = remaining.top_scorelines(top_n)
+        markets = {}
+        for line in OVER_UNDER_LINES:
+            probability = over(line)
+            markets[f"over_{int(line)}"] = probability
+            markets[f"under_{int(line)}"] = 1.0 - probability
+        markets["btts_yes"] = home_scores * away_scores
+        markets["btts_no"] = 1.0 - home_scores * away_scores
+
+        self.revision += 1
+        self._last_key = key
+        self._last_state = {
+            "match_id": self.match_id,
+            "revision": self.revision,
+            "minute": minute,
+            "score": {"home": home_goals, "away": away_goals},
+            "probabilities": {
+                "home_win": float(difference[final_margin > 0].sum()),
+                "draw": float(difference[final_margin == 0].sum()),
+                "away_win": float(difference[final_margin < 0].sum()),
+            },
+            "expected_final_goals": {
+                "home": home_goals + self.home_lambda * fraction,
+                "away": away_goals + self.away_lambda * fraction,
+            },
+            "scorelines": [
+                {"score": f"{home_goals + home}-{away_goals + away}", "probability": float(prob)}
+                for home, away, prob in zip(home_extra[0].tolist(), away_extra[0].tolist(), probs[0].tolist())
+            ],
+            "goal_markets": markets,
+            "pre_match": self.pre_match,
+        }
+        return self._last_state
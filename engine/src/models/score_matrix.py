@@ -0,0 +1,188 @@
+"""
+Score Matrix Module
+Joint home/away goal distribution shared by every goal-based market
+"""
+import numpy as np
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Probability mass allowed to fall beyond the truncation bound
+TAIL_PROBABILITY = 1e-6
+MIN_GOALS = 5
+MAX_GOALS = 30
+
+OVER_UNDER_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+HANDICAP_LINES = (-2.5, -1.5, -0.5, 0.5, 1.5)
+
+_LOG_FACTORIALS = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, MAX_GOALS + 1)))))
+
+
+def exact_poisson_pmf(lambdas, max_goals: int) -> np.ndarray:
+    """
+    Poisson probabilities of 0..max_goals goals for each lambda
+    Returns an array of shape lambdas.shape + (max_goals + 1,)
+    """
+    lambdas = np.asarray(lambdas, dtype=float)[..., None]
+    goals = np.arange(max_goals + 1)
+
+    # Log space keeps large lambdas from overflowing lambda ** k
+    log_lambdas = np.log(np.maximum(lambdas, np.finfo(float).tiny))
+    pmf = np.exp(goals * log_lambdas - lambdas - _LOG_FACTORIALS[: max_goals + 1])
+
+    # A team with no expected goals scores zero with certainty
+    return np.where(lambdas > 0, pmf, goals == 0)
+
+
+def poisson_cdf(lambdas, max_goals: int) -> np.ndarray:
+    """P(goals <= k) for k in 0..max_goals, shaped like exact_poisson_pmf"""
+    return np.cumsum(exact_poisson_pmf(lambdas, max_goals), axis=-1)
+
+
+def goal_bound(lambdas, tail: float = TAIL_PROBABILITY) -> int:
+    """
+    Smallest goal count G with P(goals > G) <= tail for the largest lambda,
+    clipped to [MIN_GOALS, MAX_GOALS]
+    """
+    lambdas = np.asarray(lambdas, dtype=float)
+    max_lambda = float(np.max(lambdas, initial=0.0, where=np.isfinite(lambdas)))
+    survival = 1.0 - poisson_cdf(max_lambda, MAX_GOALS)
+    within_tail = np.flatnonzero(survival <= tail)
+    bound = int(within_tail[0]) if within_tail.size else MAX_GOALS
+    return min(MAX_GOALS, max(MIN_GOALS, bound))
+
+
+@lru_cache(maxsize=None)
+def _sum_indicator(max_goals: int, sign: int) -> np.ndarray:
+    """
+    One-hot map from flattened (home, away) cells to home + sign * away,
+    offset so the smallest value lands in column 0
+    """
+    goals = np.arange(max_goals + 1)
+    values = (goals[:, None] + sign * goals[None, :]).ravel()
+    values = values - values.min()
+    indicator = np.zeros((values.size, values.max() + 1))
+    indicator[np.arange(values.size), values] = 1.0
+    return indicator
+
+
+class ScoreMatrix:
+    """
+    Joint goal distribution for N matches, shape (N, G + 1, G + 1)
+    Rows are home goals, columns are away goals. Goals are modelled as
+    independent Poisson variables truncated at an adaptive bound G; a
+    non-zero rho applies the Dixon-Coles low-score dependence correction.
+    """
+
+    def __init__(self, home_lambda, away_lambda, max_goals: int = None, rho: float = 0.0):
+        self.home_lambda = np.atleast_1d(np.asarray(home_lambda, dtype=float))
+        self.away_lambda = np.atleast_1d(np.asarray(away_lambda, dtype=float))
+
+        if max_goals is None:
+            max_goals = goal_bound(np.concatenate((self.home_lambda, self.away_lambda)))
+        self.max_goals = max_goals
+        self.rho = rho
+
+        self.home_pmf = exact_poisson_pmf(self.home_lambda, max_goals)
+        self.away_pmf = exact_poisson_pmf(self.away_lambda, max_goals)
+        self.matrix = self.home_pmf[:, :, None] * self.away_pmf[:, None, :]
+
+        if rho:
+            # tau factors for 0-0, 0-1, 1-0 and 1-1; they leave the total mass unchanged
+            self.matrix[:, 0, 0] *= 1 - self.home_lambda * self.away_lambda * rho
+            self.matrix[:, 0, 1] *= 1 + self.home_lambda * rho
+            self.matrix[:, 1, 0] *= 1 + self.away_lambda * rho
+            self.matrix[:, 1, 1] *= 1 - rho
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def outcome_probabilities(self) -> Dict[str, np.ndarray]:
+        """Home win / draw / away win probabilities"""
+        return {
+            "home_win": np.tril(self.matrix, -1).sum(axis=(1, 2)),
+            "draw": np.trace(self.matrix, axis1=1, axis2=2),
+            "away_win": np.triu(self.matrix, 1).sum(axis=(1, 2)),
+        }
+
+    def total_goals(self) -> np.ndarray:
+        """Distribution of home + away goals, shape (N, 2G + 1)"""
+        flat = self.matrix.reshape(len(self), -1)
+        return flat @ _sum_indicator(self.max_goals, 1)
+
+    def goal_difference(self) -> np.ndarray:
+        """Distribution of home - away goals from -G to G, shape (N, 2G + 1)"""
+        flat = self.matrix.reshape(len(self), -1)
+        return flat @ _sum_indicator(self.max_goals, -1)
+
+    def top_scorelines(self, top_n: int = 5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Most likely scorelines per match, most likely first
+        Returns (home_goals, away_goals, probability) arrays of shape (N, top_n)
+        """
+        flat = self.matrix.reshape(len(self), -1)
+        top_n = min(top_n, flat.shape[1])
+
+        # Partial sort: only the top_n cells get fully ordered
+        candidates = np.argpartition(-flat, top_n - 1, axis=1)[:, :top_n]
+        candidate_probs = np.take_along_axis(flat, candidates, axis=1)
+        order = np.argsort(-candidate_probs, axis=1, kind="stable")
+        cells = np.take_along_axis(candidates, order, axis=1)
+
+        home_goals, away_goals = np.divmod(cells, self.max_goals + 1)
+        return home_goals, away_goals, np.take_along_axis(flat, cells, axis=1)
+
+    def over_under(self, lines=OVER_UNDER_LINES) -> Dict[float, np.ndarray]:
+        """P(total goals > line) for each half-goal line"""
+        cumulative = np.cumsum(self.total_goals(), axis=1)
+
+        # Over is the complement of under so truncated tail mass counts as over
+        return {line: 1.0 - cumulative[:, int(np.floor(line))] for line in lines}
+
+    def both_teams_to_score(self) -> np.ndarray:
+        """P(home goals > 0 and away goals > 0)"""
+        if self.rho:
+            return self.matrix[:, 1:, 1:].sum(axis=(1, 2))
+        return (1.0 - self.home_pmf[:, 0]) * (1.0 - self.away_pmf[:, 0])
+
+    def handicap(self, lines=HANDICAP_LINES) -> Dict[float, np.ndarray]:
+        """P(home goals + line > away goals) for each half-goal home handicap"""
+        difference = self.goal_difference()
+        survival = 1.0 - np.cumsum(difference, axis=1)
+
+        # Column c of the difference distribution holds a margin of c - G
+        return {
+            line: survival[:, int(np.floor(-line)) + self.max_goals]
+            for line in lines
+        }
+
+    def scorelines(self, top_n: int = 5) -> List[List[dict]]:
+        """Top scorelines per match in the API's {'score', 'probability'} shape"""
+        home_goals, away_goals, probs = self.top_scorelines(top_n)
+        return [
+            [
+                {"score": f"{home}-{away}", "probability": float(prob)}
+                for home, away, prob in zip(home_row, away_row, prob_row)
+            ]
+            for home_row, away_row, prob_row in zip(
+                home_goals.tolist(), away_goals.tolist(), probs.tolist()
+            )
+        ]
+
+    def goal_markets(self) -> List[Dict[str, float]]:
+        """Over/under, both-teams-to-score and handicap markets per match"""
+        over = self.over_under()
+        btts = self.both_teams_to_score()
+        handicap = self.handicap()
+
+        markets = []
+        for i in range(len(self)):
+            match_markets = {}
+            for line, probs in over.items():
+                match_markets[f"over_{int(line)}"] = float(probs[i])
+                match_markets[f"under_{int(line)}"] = float(1.0 - probs[i])
+            match_markets["btts_yes"] = float(btts[i])
+            match_markets["btts_no"] = float(1.0 - btts[i])
+            for line, probs in handicap.items():
+                match_markets[f"home_handicap_{line:+g}"] = float(probs[i])
+            markets.append(match_markets)
+        return markets
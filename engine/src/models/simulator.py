@@ -0,0 +1,171 @@
+"""
+League Simulator Module
+Vectorized Monte Carlo projection of final league tables from Poisson goal
+expectations for the remaining fixtures
+"""
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+import logging
+from src.models.score_matrix import ScoreMatrix
+
+logger = logging.getLogger(__name__)
+
+# Simulations per shard; fixed so results depend only on the seed, not on
+# how many workers the shards are spread over
+SHARD_SIZE = 5000
+
+
+def _simulate_shard(
+    seed: np.random.SeedSequence,
+    n_simulations: int,
+    base: np.ndarray,
+    incidence: np.ndarray,
+    home_lambda: np.ndarray,
+    away_lambda: np.ndarray,
+) -> np.ndarray:
+    """
+    Simulate n_simulations seasons and count finishing positions
+    base is (3, T) points / goal difference / goals for, incidence is the
+    (2, F, T) one-hot map of each fixture's home and away team.
+    Returns a (T, T) matrix of team x position counts.
+    """
+    rng = np.random.default_rng(seed)
+    n_fixtures = home_lambda.size
+    home_goals = rng.poisson(home_lambda, size=(n_simulations, n_fixtures))
+    away_goals = rng.poisson(away_lambda, size=(n_simulations, n_fixtures))
+
+    margin = (home_goals - away_goals).astype(float)
+    draws = margin == 0
+    home_points = 3.0 * (margin > 0) + draws
+    away_points = 3.0 * (margin < 0) + draws
+
+    home_incidence, away_incidence = incidence
+    points = base[0] + home_points @ home_incidence + away_points @ away_incidence
+    goal_difference = base[1] + margin @ (home_incidence - away_incidence)
+    goals_for = base[2] + home_goals @ home_incidence + away_goals @ away_incidence
+
+    # Rank on points, then goal difference, then goals for, then a coin toss
+    tiebreak = rng.random(points.shape)
+    order = np.lexsort((tiebreak, -goals_for, -goal_difference, -points), axis=-1)
+
+    n_teams = base.shape[1]
+    cells = order * n_teams + np.arange(n_teams)
+    return np.bincount(cells.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+
+
+class LeagueSimulator:
+    """Monte Carlo league table projection"""
+
+    def __init__(
+        self,
+        team_ids: List[int],
+        points,
+        goal_difference,
+        goals_for,
+        home_team_ids,
+        away_team_ids,
+        home_lambda,
+        away_lambda,
+    ):
+        self.team_ids = list(team_ids)
+        index = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        n_teams = len(self.team_ids)
+
+        self.base = np.array([points, goal_difference, goals_for], dtype=float).reshape(3, n_teams)
+
+        home_index = np.array([index[team_id] for team_id in home_team_ids], dtype=np.int64)
+        away_index = np.array([index[team_id] for team_id in away_team_ids], dtype=np.int64)
+        # Float so the per-simulation aggregation runs as BLAS matrix products
+        self.incidence = np.zeros((2, home_index.size, n_teams))
+        self.incidence[0, np.arange(home_index.size), home_index] = 1
+        self.incidence[1, np.arange(away_index.size), away_index] = 1
+
+        self.home_lambda = np.asarray(home_lambda, dtype=float)
+        self.away_lambda = np.asarray(away_lambda, dtype=float)
+
+    @classmethod
+    def from_engine(cls, engine, table: List[Dict[str, Any]], fixtures: List[Dict[str, Any]]):
+        """
+        Build a simulator from a current table and the remaining fixtures
+        table rows carry team_id, points, goal_difference and goals_for;
+        fixtures are match dicts as accepted by PredictionEngine.predict_batch
+        """
+        features = engine.engineer_features_batch(fixtures)
+        home_lambda, away_lambda = engine.expected_goals(features)
+        return cls(
+            team_ids=[row["team_id"] for row in table],
+            points=[row.get("points", 0) for row in table],
+            goal_difference=[row.get("goal_difference", 0) for row in table],
+            goals_for=[row.get("goals_for", 0) for row in table],
+            home_team_ids=[fixture["home_team_id"] for fixture in fixtures],
+            away_team_ids=[fixture["away_team_id"] for fixture in fixtures],
+            home_lambda=home_lambda,
+            away_lambda=away_lambda,
+        )
+
+    def position_counts(self, n_simulations: int, seed: int = None, n_workers: int = 1) -> np.ndarray:
+        """
+        Team x finishing-position counts over n_simulations seasons
+        Simulations are split into SHARD_SIZE shards, each with its own child
+        of SeedSequence(seed), and shards run on up to n_workers processes.
+        """
+        shard_sizes = [SHARD_SIZE] * (n_simulations // SHARD_SIZE)
+        if n_simulations % SHARD_SIZE:
+            shard_sizes.append(n_simulations % SHARD_SIZE)
+        seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+
+        n_teams = len(self.team_ids)
+        args = [
+            (shard_seed, size, self.base, self.incidence, self.home_lambda, self.away_lambda)
+            for shard_seed, size in zip(seeds, shard_sizes)
+        ]
+
+        counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        if n_workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(args))) as pool:
+                for shard_counts in pool.map(_simulate_shard, *zip(*args)):
+                    counts += shard_counts
+        else:
+            for shard_args in args:
+                counts += _simulate_shard(*shard_args)
+        return counts
+
+    def simulate(
+        self,
+        n_simulations: int = 10000,
+        seed: int = None,
+        n_workers: int = 1,
+        relegation_places: int = 3,
+        top_places: int = 4,
+    ) -> Dict[str, Any]:
+        """
+        Project final standings
+        Returns per-team position probabilities (row per team, column per
+        finishing position), title / top-N / relegation odds and expected points.
+        """
+        counts = self.position_counts(n_simulations, seed, n_workers)
+        probabilities = counts / max(n_simulations, 1)
+
+        n_teams = len(self.team_ids)
+        expected_points = self.base[0] + (
+            self._expected_match_points(home=True) @ self.incidence[0]
+            + self._expected_match_points(home=False) @ self.incidence[1]
+        )
+
+        return {
+            "team_ids": self.team_ids,
+            "n_simulations": n_simulations,
+            "position_probabilities": probabilities,
+            "title": probabilities[:, 0],
+            "top": probabilities[:, :top_places].sum(axis=1),
+            "relegation": probabilities[:, max(n_teams - relegation_places, 0):].sum(axis=1),
+            "expected_position": probabilities @ np.arange(1, n_teams + 1),
+            "expected_points": expected_points,
+        }
+
+    def _expected_match_points(self, home: bool) -> np.ndarray:
+        """Analytic expected points per fixture for the home or away side"""
+        outcomes = ScoreMatrix(self.home_lambda, self.away_lambda).outcome_probabilities()
+        win = outcomes["home_win"] if home else outcomes["away_win"]
+        return 3 * win + outcomes["draw"]
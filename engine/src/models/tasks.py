@@ -0,0 +1,66 @@
+"""
+Engine Tasks
+Module-level entry points into the shared PredictionEngine. Being plain
+module functions they pickle by reference, so the same calls work inline,
+on a thread pool, or inside process-pool workers (each with its own engine).
+"""
+from src.lib.config import settings
+from src.models.ensemble import MATCH_DEFAULTS, PredictionEngine
+from src.models.simulator import LeagueSimulator
+
+engine = PredictionEngine()
+# Loaded at import so process-pool workers pick the fitted ratings up too
+engine.load_dixon_coles(settings.DIXON_COLES_PATH, settings.DIXON_COLES_WEIGHT)
+engine.load_ensemble_config(settings.ENSEMBLE_CONFIG_PATH)
+engine.configure(escalation_agreement=settings.TIER_ESCALATION_AGREEMENT)
+
+
+def model_version() -> str:
+    """MODEL_VERSION qualified by a fingerprint of the parameters this process loaded"""
+    return f"{settings.MODEL_VERSION}-{engine.fingerprint()}"
+
+
+def predict_match(match_data: dict) -> dict:
+    return engine.predict_match(match_data)
+
+
+def predict_full(match_data: dict) -> dict:
+    return engine.predict_full(match_data)
+
+
+def predict_tiered(match_data: dict, tier: str) -> dict:
+    return engine.predict_tiered(match_data, tier)
+
+
+def predict_batch(match_data, tier: str = "full") -> dict:
+    return engine.predict_batch(match_data, tier)
+
+
+def predict_full_batch(match_data) -> list:
+    return engine.predict_full_batch(match_data)
+
+
+def sensitivity(match_data: dict, tier: str = "full") -> dict:
+    return engine.sensitivity(match_data, tier)
+
+
+def inplay_prematch(match_data: dict) -> dict:
+    """Pre-match goal expectations and ensemble probabilities an in-play match starts from"""
+    features = engine.engineer_features(match_data)
+    home_lambda, away_lambda = engine.expected_goals(features)
+    return {
+        "home_lambda": float(home_lambda),
+        "away_lambda": float(away_lambda),
+        "pre_match": engine.ensemble_predictions(engine.run_models(features)),
+    }
+
+
+def prewarm() -> None:
+    """Run one single and one batch prediction so first requests skip one-off setup costs"""
+    match = dict(MATCH_DEFAULTS, home_team_id=0, away_team_id=1)
+    engine.predict_full(match)
+    engine.predict_full_batch([match, match])
+
+
+def simulate_league(table: list, fixtures: list, options: dict) -> dict:
+    return LeagueSimulator.from_engine(engine, table, fixtures).simulate(**options)
@@ -0,0 +1,359 @@
+"""
+Team State Module
+Server-side rolling form, momentum and Elo rating per team, updated in O(1)
+per ingested result so predictions can look strength up instead of parsing
+client-supplied form strings
+
+Every worker shares the state through two files: an append-only log of
+ingested results and a compressed snapshot the log is folded into every
+compact_every results. Recording a result appends one fixed-size record
+under an exclusive lock; the other workers replay the records they have
+not seen yet from a background task (see refresh). Ingest is deterministic,
+so replaying the same log in the same order gives every worker the same state.
+"""
+import fcntl
+import numpy as np
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+import logging
+from src.features.engineering import FeatureEngineer
+from src.lib.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Results kept per team: enough for the 5/10/20 match points windows
+HISTORY = 20
+WINDOWS = (5, 10, 20)
+FORM_WINDOW = 5
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE_ELO = 60.0
+
+ARRAYS = ("team_ids", "results", "head", "played", "window_points", "form_counts", "rating")
+
+# Log records are int64 (home_team_id, away_team_id, home_goals, away_goals);
+# the first record-sized slot holds the log's id
+RECORD_FIELDS = 4
+RECORD_BYTES = RECORD_FIELDS * 8
+
+
+class _Tables:
+    """One version of every per-team array, the team_id -> row index and the revision"""
+
+    __slots__ = ("index", "revision") + ARRAYS
+
+    def __init__(self, capacity: int):
+        self.index: Dict[int, int] = {}
+        self.revision = 0
+        self.team_ids = np.zeros(capacity, dtype=np.int64)
+        self.results = np.full((capacity, HISTORY), -1, dtype=np.int8)
+        self.head = np.zeros(capacity, dtype=np.int16)
+        self.played = np.zeros(capacity, dtype=np.int32)
+        self.window_points = np.zeros((capacity, len(WINDOWS)), dtype=np.int32)
+        self.form_counts = np.zeros((capacity, 2), dtype=np.int16)  # wins, draws
+        self.rating = np.full(capacity, INITIAL_RATING)
+
+    def grown(self, capacity: int) -> "_Tables":
+        tables = _Tables(capacity)
+        for name in ARRAYS:
+            values = getattr(self, name)
+            getattr(tables, name)[: len(values)] = values
+        tables.index = dict(self.index)
+        tables.revision = self.revision
+        return tables
+
+
+def _push_result(tables: _Tables, row: int, points: int):
+    """Append one result to a team's ring buffer, updating every window in O(1)"""
+    head = int(tables.head[row])
+    played = int(tables.played[row])
+
+    for i, window in enumerate(WINDOWS):
+        if played >= window:
+            tables.window_points[row, i] -= tables.results[row, (head - window) % HISTORY]
+        tables.window_points[row, i] += points
+
+    if played >= FORM_WINDOW:
+        leaving = tables.results[row, (head - FORM_WINDOW) % HISTORY]
+        tables.form_counts[row] -= (leaving == 3, leaving == 1)
+    tables.form_counts[row] += (points == 3, points == 1)
+
+    tables.results[row, head] = points
+    tables.head[row] = (head + 1) % HISTORY
+    tables.played[row] = played + 1
+
+
+def _row(tables: _Tables, team_id: int):
+    """(tables, row) for team_id, adding a row (in a grown copy when full) for a new team"""
+    row = tables.index.get(team_id)
+    if row is None:
+        row = len(tables.index)
+        if row >= len(tables.team_ids):
+            tables = tables.grown(2 * len(tables.team_ids))
+        tables.team_ids[row] = team_id
+        tables.index[team_id] = row
+    return tables, row
+
+
+def _apply(tables: _Tables, home_team_id: int, away_team_id: int, home_goals: int, away_goals: int) -> _Tables:
+    """Record one finished match for both teams; returns the tables to publish"""
+    tables, home = _row(tables, home_team_id)
+    tables, away = _row(tables, away_team_id)
+
+    if home_goals > away_goals:
+        home_points, away_points, home_score = 3, 0, 1.0
+    elif home_goals == away_goals:
+        home_points, away_points, home_score = 1, 1, 0.5
+    else:
+        home_points, away_points, home_score = 0, 3, 0.0
+
+    _push_result(tables, home, home_points)
+    _push_result(tables, away, away_points)
+
+    rating_gap = tables.rating[away] - (tables.rating[home] + HOME_ADVANTAGE_ELO)
+    expected_home = 1.0 / (1.0 + 10 ** (rating_gap / 400.0))
+    change = K_FACTOR * (home_score - expected_home)
+    tables.rating[home] += change
+    tables.rating[away] -= change
+
+    tables.revision += 1
+    return tables
+
+
+class TeamStateStore:
+    """
+    Array-backed per-team state indexed by team_id
+    Each team owns one row: a ring buffer of its last HISTORY results (as
+    points, -1 when empty), running points sums for each window, win/draw
+    counts over the form window and an Elo rating.
+    Readers take the published tables once per call; a reload builds new
+    tables aside and publishes them in one assignment.
+    """
+
+    def __init__(self, capacity: int = 64, compact_every: int = 10000):
+        self._lock = threading.Lock()
+        self._tables = _Tables(capacity)
+        self.compact_every = compact_every
+        self.path = None
+        self._log_id = None
+        self._applied = 0  # records of the current log folded into _tables
+        self._synced = False
+
+    def __len__(self) -> int:
+        return len(self._tables.index)
+
+    def __contains__(self, team_id: int) -> bool:
+        return team_id in self._tables.index
+
+    @property
+    def revision(self) -> int:
+        return self._tables.revision
+
+    @property
+    def log_path(self) -> str:
+        return f"{os.path.splitext(self.path)[0]}.log"
+
+    def ingest(self, home_team_id: int, away_team_id: int, home_goals: int, away_goals: int):
+        """Record a finished match for both teams in this process only"""
+        with self._lock:
+            self._tables = _apply(self._tables, home_team_id, away_team_id, home_goals, away_goals)
+
+    def form_index(self, team_id: int) -> Optional[float]:
+        """Form index over the last FORM_WINDOW results (W=1, D=0.5, L=0), None if unknown"""
+        tables = self._tables
+        row = tables.index.get(team_id)
+        if row is None or tables.played[row] == 0:
+            return None
+        wins, draws = tables.form_counts[row]
+        return float((wins + 0.5 * draws) / min(tables.played[row], FORM_WINDOW))
+
+    def form_index_batch(self, team_ids) -> np.ndarray:
+        """form_index for many teams, NaN where a team is unknown"""
+        tables = self._tables
+        rows = np.array([tables.index.get(team_id, -1) for team_id in team_ids], dtype=np.int64)
+        known = rows >= 0
+        played = np.where(known, tables.played[rows], 0)
+        wins, draws = tables.form_counts[rows].T
+        index = (wins + 0.5 * draws) / np.maximum(np.minimum(played, FORM_WINDOW), 1)
+        return np.where(known & (played > 0), index, np.nan)
+
+    def form_string(self, team_id: int) -> str:
+        """Last FORM_WINDOW results, oldest first, as a W/D/L string"""
+        return self._form_string(self._tables, team_id)
+
+    @staticmethod
+    def _form_string(tables: _Tables, team_id: int) -> str:
+        row = tables.index.get(team_id)
+        if row is None:
+            return ""
+        count = min(int(tables.played[row]), FORM_WINDOW)
+        slots = (int(tables.head[row]) - count + np.arange(count)) % HISTORY
+        return "".join({3: "W", 1: "D", 0: "L"}[int(points)] for points in tables.results[row, slots])
+
+    def state(self, team_id: int) -> Optional[dict]:
+        """Full tracked state for one team, None if unknown"""
+        tables = self._tables
+        row = tables.index.get(team_id)
+        if row is None:
+            return None
+        points = {f"points_last_{window}": int(tables.window_points[row, i]) for i, window in enumerate(WINDOWS)}
+        played = int(tables.played[row])
+        wins, draws = tables.form_counts[row]
+        return {
+            "team_id": team_id,
+            "played": played,
+            "form": self._form_string(tables, team_id),
+            "form_index": float((wins + 0.5 * draws) / min(played, FORM_WINDOW)) if played else None,
+            "momentum": FeatureEngineer.calculate_momentum_score(
+                points["points_last_5"], points["points_last_10"], points["points_last_20"]
+            ),
+            "elo_rating": float(tables.rating[row]),
+            **points,
+        }
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """flock shared between processes (and between threads, each opening its own handle)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _read_log(self, start: int):
+        """(log id, int64 records from index start) of the log file, (None, empty) without one"""
+        try:
+            with open(self.log_path, "rb") as f:
+                header = f.read(RECORD_BYTES)
+                if len(header) < RECORD_BYTES:
+                    return None, np.zeros((0, RECORD_FIELDS), dtype=np.int64)
+                f.seek(RECORD_BYTES * (1 + start))
+                data = f.read()
+        except FileNotFoundError:
+            return None, np.zeros((0, RECORD_FIELDS), dtype=np.int64)
+        # A record cut short by a crash mid-append is ignored
+        count = len(data) // RECORD_BYTES
+        records = np.frombuffer(data[: count * RECORD_BYTES], dtype=np.int64).reshape(count, RECORD_FIELDS)
+        return int(np.frombuffer(header, dtype=np.int64)[0]), records
+
+    def _read_snapshot(self):
+        """(tables, log id, records folded) from the snapshot, (empty tables, None, 0) without one"""
+        if not os.path.exists(self.path):
+            return _Tables(64), None, 0
+        with np.load(self.path) as data:
+            size = len(data["team_ids"])
+            tables = _Tables(max(64, 2 * size))
+            for name in ARRAYS:
+                getattr(tables, name)[:size] = data[name]
+            tables.index = {int(team_id): row for row, team_id in enumerate(data["team_ids"])}
+            tables.revision = int(data["revision"])
+            # Snapshots saved before the log existed name none
+            if "log_id" not in data.files:
+                return tables, None, 0
+            return tables, int(data["log_id"]), int(data["log_records"])
+
+    def _sync(self):
+        """
+        Bring this process up to date with the files; caller holds _lock and the file lock
+        Reads only the records appended since the last sync, unless the log was
+        compacted (new id), which reloads the snapshot aside and publishes it
+        whole. Returns the id of the log on disk.
+        """
+        log_id, records = self._read_log(self._applied)
+        if not self._synced or log_id != self._log_id:
+            tables, snapshot_log_id, folded = self._read_snapshot()
+            applied = folded
+            if log_id is not None and log_id == snapshot_log_id:
+                # A log whose id the snapshot does not name is already folded into it
+                records = self._read_log(folded)[1]
+            else:
+                records = records[:0]
+            self._log_id = snapshot_log_id
+        else:
+            tables, applied = self._tables, self._applied
+
+        for record in records:
+            tables = _apply(tables, *(int(value) for value in record))
+        self._tables = tables
+        self._applied = applied + len(records)
+        self._synced = True
+        return log_id
+
+    def _compact(self):
+        """Fold the log into a new snapshot and start an empty log; caller holds both locks"""
+        tables = self._tables
+        size = len(tables.index)
+        log_id = int.from_bytes(os.urandom(8), "little") >> 1
+        arrays = {name: getattr(tables, name)[:size] for name in ARRAYS}
+
+        temporary = f"{self.path}.tmp.npz"
+        np.savez_compressed(
+            temporary, **arrays, revision=np.array(tables.revision),
+            log_id=np.array(log_id), log_records=np.array(0),
+        )
+        log_temporary = f"{self.log_path}.tmp"
+        with open(log_temporary, "wb") as f:
+            f.write(np.array([log_id] + [0] * (RECORD_FIELDS - 1), dtype=np.int64).tobytes())
+        # Snapshot first: a crash in between leaves an old log the snapshot
+        # does not name, which _sync then ignores as already folded
+        os.replace(temporary, self.path)
+        os.replace(log_temporary, self.log_path)
+        self._log_id = log_id
+        self._applied = 0
+        logger.info(f"Team state compacted ({size} teams, revision {tables.revision})")
+
+    def load(self, path: str) -> bool:
+        """Load the snapshot and replay the log at path; returns False when neither exists yet"""
+        self.path = path
+        if not (os.path.exists(path) or os.path.exists(self.log_path)):
+            return False
+        with self._lock, self._file_lock(exclusive=False):
+            self._synced = False
+            self._sync()
+        logger.info(f"✅ Team state loaded ({len(self)} teams, revision {self.revision})")
+        return True
+
+    def refresh(self):
+        """Replay results other processes recorded since the last sync (blocking: run off the event loop)"""
+        if self.path is None:
+            return
+        with self._lock, self._file_lock(exclusive=False):
+            self._sync()
+
+    def record(self, results) -> None:
+        """
+        Ingest (home_team_id, away_team_id, home_goals, away_goals) results for every worker
+        Under an exclusive lock: catch up with the log, apply the results and
+        append one record per result. Without a path (load never called) only
+        this process is updated.
+        """
+        results = [tuple(int(value) for value in result) for result in results]
+        if self.path is None:
+            for result in results:
+                self.ingest(*result)
+            return
+
+        with self._lock, self._file_lock(exclusive=True):
+            log_id = self._sync()
+            if log_id is None or log_id != self._log_id:
+                # No log yet, or one left behind by an interrupted compaction
+                self._compact()
+
+            tables = self._tables
+            for result in results:
+                tables = _apply(tables, *result)
+            self._tables = tables
+
+            with open(self.log_path, "ab") as f:
+                f.write(np.array(results, dtype=np.int64).reshape(-1, RECORD_FIELDS).tobytes())
+            self._applied += len(results)
+
+            if self._applied >= self.compact_every:
+                self._compact()
+
+
+team_state = TeamStateStore(compact_every=settings.TEAM_STATE_COMPACT_EVERY)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from src.lib.profiling import profiler
+
+router = APIRouter()
+
+def require_token(token: Optional[str]):
+    if not profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@router.get("/profiles")
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Profiles captured by any worker, newest first"""
+    require_token(x_profile_token)
+    return {
+        "success": True,
+        "sample_rate": profiler.sample_rate,
+        "profiles": await profiler.summaries(),
+    }
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """One profile as collapsed stacks (self time in microseconds), for flamegraph.pl or speedscope"""
+    require_token(x_profile_token)
+    profile = await profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile["collapsed"])
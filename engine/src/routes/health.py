@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from src.features.stats_store import stats_store
+from src.lib import workers
+from src.lib.config import settings
+from src.lib.startup import startup
 
 router = APIRouter()
 
@@ -7,5 +11,22 @@ async def health():
     return {
         "status": "healthy",
         "service": "Predictsports AI Engine",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "startup_mode": settings.STARTUP_MODE,
+        "startup": startup.report(),
+        "statistics": stats_store.stats(),
+        "worker": workers.identity,
+    }
+
+@router.get("/workers")
+async def worker_health():
+    """Latest heartbeat of every worker under src.serve (empty when single-process)"""
+    statuses = workers.read_statuses(settings.WORKER_STATUS_DIR)
+    stale_after = 3 * settings.WORKER_HEARTBEAT_INTERVAL
+    for status in statuses:
+        status["healthy"] = status["ready"] and status["heartbeat_age_seconds"] <= stale_after
+    return {
+        "workers": statuses,
+        "healthy": sum(status["healthy"] for status in statuses),
+        "pss_kib_total": sum(status["memory_kib"].get("pss", 0) for status in statuses),
     }
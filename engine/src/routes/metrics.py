@@ -0,0 +1,100 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.lib.executor import executor
+from src.lib.metrics import registry
+from src.lib.prediction_cache import prediction_cache
+from src.lib.startup import startup
+
+router = APIRouter()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests", "HTTP requests handled", ("method", "route", "status")
+)
+HTTP_ERRORS = registry.counter(
+    "http_errors", "HTTP requests answered with a 5xx status", ("method", "route")
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_seconds", "Time from request to the end of the response", ("method", "route")
+)
+
+def route_template(scope) -> str:
+    """Path template of the matched route, router prefix included (e.g. /predictions/teams/{team_id}/state)"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # FastAPI releases that no longer flatten included routers report the
+    # router-relative route; their effective route context has the full path
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return context.path if context is not None else route.path
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting requests and timing them per route template
+
+    Labels use the matched route's path template (e.g. /predictions/predict)
+    rather than the raw URL so series cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            path = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=path, status=str(status))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=path)
+            if status >= 500:
+                HTTP_ERRORS.inc(method=method, route=path)
+
+def cache_metrics():
+    stats = prediction_cache.stats()
+    return [
+        ("prediction_cache_hits_total", "counter", "Prediction cache hits", stats["hits"]),
+        ("prediction_cache_misses_total", "counter", "Prediction cache misses", stats["misses"]),
+        ("prediction_cache_coalesced_total", "counter", "Requests that joined an in-flight computation", stats["coalesced"]),
+        ("prediction_cache_errors_total", "counter", "Prediction cache Redis errors", stats["errors"]),
+        ("prediction_cache_inflight", "gauge", "Keys currently being computed", stats["inflight"]),
+    ]
+
+def executor_metrics():
+    stats = executor.stats()
+    return [
+        ("engine_executor_in_flight", "gauge", "Engine calls running or queued", stats["in_flight"]),
+        ("engine_executor_queue_depth", "gauge", "Engine calls waiting for a worker", stats["queue_depth"]),
+        ("engine_executor_completed_total", "counter", "Engine calls completed", stats["completed"]),
+        ("engine_executor_failed_total", "counter", "Engine calls that raised", stats["failed"]),
+        ("engine_executor_rejected_total", "counter", "Engine calls rejected by admission control", stats["rejected"]),
+        ("engine_executor_wait_seconds_mean", "gauge", "Mean queue wait before an engine call starts", stats["mean_wait_ms"] / 1000),
+    ]
+
+def startup_metrics():
+    if startup.ready_seconds is None:
+        return []
+    return [
+        ("engine_startup_seconds", "gauge", "Time from first import to serving readiness", startup.ready_seconds),
+    ]
+
+registry.register_collector(cache_metrics)
+registry.register_collector(executor_metrics)
+registry.register_collector(startup_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of engine, cache and HTTP metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,18 +1,96 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from src.models.ensemble import PredictionEngine
+import asyncio
+import json
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from typing import List, Literal, Optional
+from src.models import tasks
+from src.lib.config import settings
+from src.lib.encoding import ARROW, JSON, MSGPACK, dumps_json, encode, negotiate
+from src.lib.executor import ExecutorSaturated, executor
+from src.lib.inplay_hub import inplay_hub
+from src.lib.micro_batcher import MicroBatcher
+from src.lib.precomputed import precomputed_predictions
+from src.lib.redis_client import breaker
+from src.lib.prediction_cache import prediction_cache
+from src.lib.profiling import PROFILE_HEADER, profiler
+from src.models.inplay import InPlayMatch
+from src.models.team_state import team_state
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-engine = PredictionEngine()
+
+# fast: closed-form members only; full: whole ensemble, scorelines and markets;
+# auto: fast, escalating to full when the fast members disagree
+Tier = Literal["fast", "full", "auto"]
+engine = tasks.engine
+
+class TableRow(BaseModel):
+    team_id: int
+    points: int = 0
+    goal_difference: int = 0
+    goals_for: int = 0
+
+class MatchResult(BaseModel):
+    home_team_id: int
+    away_team_id: int
+    home_goals: int = Field(ge=0)
+    away_goals: int = Field(ge=0)
+
+class ResultsInput(BaseModel):
+    results: List[MatchResult]
+
+class InPlayEvent(BaseModel):
+    minute: float = Field(ge=0, le=130)
+    home_goals: int = Field(ge=0)
+    away_goals: int = Field(ge=0)
+    # Marks the last update of the match; its state is then released
+    final: bool = False
+
+# Live matches this worker has seen, rebuilt from Redis on a miss
+live_matches = {}
+
+async def run_full_batch(matches: list) -> list:
+    return await executor.run(tasks.predict_full_batch, matches)
+
+# Concurrent full-tier /predict calls share one vectorized engine pass when enabled
+full_batcher = MicroBatcher(
+    run_full_batch,
+    max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+    max_wait=settings.MICRO_BATCH_WAIT_MS / 1000,
+)
+
+def with_team_state(match_data: dict) -> dict:
+    """Fill strengths from tracked team state for sides sent without a form string"""
+    for side in ("home", "away"):
+        if match_data.get(f"{side}_form") is None:
+            strength = team_state.form_index(match_data[f"{side}_team_id"])
+            if strength is not None:
+                match_data[f"{side}_strength"] = strength
+    return match_data
+
+def with_team_state_columns(columns: dict) -> dict:
+    """Columnar with_team_state for batch requests without form columns"""
+    for side in ("home", "away"):
+        if columns.get(f"{side}_form") is None:
+            columns[f"{side}_strength"] = team_state.form_index_batch(columns[f"{side}_team_id"])
+    return columns
+
+def saturated_response(error: ExecutorSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Prediction engine saturated, retry shortly",
+        headers={"Retry-After": str(error.retry_after)},
+    )
 
 class MatchInput(BaseModel):
     home_team_id: int
     away_team_id: int
-    home_form: str = "WWW"
-    away_form: str = "WWW"
+    # Leave a form out to use the server-side team state for that team
+    home_form: Optional[str] = None
+    away_form: Optional[str] = None
     home_xg: float = 1.5
     away_xg: float = 1.2
     home_possession: float = 50
@@ -21,68 +99,503 @@ class MatchInput(BaseModel):
     away_defensive_rating: float = 0.75
     is_home_advantage: bool = True
 
+class BatchMatchInput(BaseModel):
+    """Columnar batch of matches: one list per MatchInput field
+
+    Only the team id columns are required; any other column left out
+    takes the MatchInput default for every match.
+    """
+    home_team_id: List[int]
+    away_team_id: List[int]
+    home_form: Optional[List[str]] = None
+    away_form: Optional[List[str]] = None
+    home_xg: Optional[List[float]] = None
+    away_xg: Optional[List[float]] = None
+    home_possession: Optional[List[float]] = None
+    away_possession: Optional[List[float]] = None
+    home_defensive_rating: Optional[List[float]] = None
+    away_defensive_rating: Optional[List[float]] = None
+    is_home_advantage: Optional[List[bool]] = None
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        size = len(self.home_team_id)
+        for name, values in self:
+            if values is not None and len(values) != size:
+                raise ValueError(f"Column '{name}' has {len(values)} values, expected {size}")
+        return self
+
 @router.post("/predict")
-async def predict_match(match: MatchInput):
-    """Generate predictions for a match"""
+async def predict_match(
+    match: MatchInput,
+    tier: Tier = "full",
+    accept: Optional[str] = Header(None),
+    profile_token: Optional[str] = Header(None, alias=PROFILE_HEADER),
+):
+    """Generate predictions for a match (JSON or MessagePack)
+
+    A profiled request (see lib/profiling.py) skips the caches, and its
+    response carries the stored profile's id in X-Profile-Id.
+    """
+    media_type = negotiate(accept, (JSON, MSGPACK))
     try:
-        match_data = match.dict()
+        match_data = with_team_state(match.dict())
+        trigger = profiler.trigger(profile_token)
         
-        # Get ensemble predictions
-        prediction = engine.predict_match(match_data)
+        if trigger is not None:
+            fn, args = (tasks.predict_full, (match_data,)) if tier == "full" else (tasks.predict_tiered, (match_data, tier))
+            predictions, profile_id = await profiler.run(executor, "/predict", trigger, fn, *args)
+            response = encode({
+                "success": True,
+                "match_id": f"{match.home_team_id}_vs_{match.away_team_id}",
+                "predictions": predictions,
+            }, media_type)
+            response.headers["X-Profile-Id"] = profile_id
+            return response
         
-        # Generate scorelines
-        features = engine.engineer_features(match_data)
-        scorelines = engine.generate_scorelines(features)
+        if tier == "full":
+            precomputed = await precomputed_predictions.get(match_data)
+            if precomputed is not None:
+                if media_type == JSON:
+                    return Response(content=precomputed, media_type=JSON, headers={"Vary": "Accept"})
+                return encode(json.loads(precomputed), media_type)
         
-        # Calculate goal markets
-        home_lambda = features['home_strength'] * features['home_xg']
-        away_lambda = features['away_strength'] * features['away_xg']
+        async def compute():
+            if tier == "full" and settings.MICRO_BATCH_ENABLED:
+                predictions = await full_batcher.submit(match_data)
+            elif tier == "full":
+                predictions = await executor.run(tasks.predict_full, match_data)
+            else:
+                predictions = await executor.run(tasks.predict_tiered, match_data, tier)
+            return {
+                "success": True,
+                "match_id": f"{match.home_team_id}_vs_{match.away_team_id}",
+                "predictions": predictions,
+            }
         
-        total_goals_probs = {}
-        for total in [0.5, 1.5, 2.5, 3.5]:
-            prob = sum(
-                np.exp(-home_lambda) * (home_lambda ** i) / np.math.factorial(i) *
-                np.exp(-away_lambda) * (away_lambda ** j) / np.math.factorial(j)
-                for i in range(int(total) + 1)
-                for j in range(int(total) + 1)
-                if i + j >= total
-            )
-            total_goals_probs[f'over_{int(total)}'] = float(prob)
+        namespace = "predict" if tier == "full" else f"predict_{tier}"
+        result = await prediction_cache.get_or_compute(
+            prediction_cache.key(namespace, match_data), compute
+        )
+        return encode(result, media_type)
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Prediction failed")
+
+@router.post("/predict/batch")
+async def predict_batch(batch: BatchMatchInput, tier: Tier = "full", accept: Optional[str] = Header(None)):
+    """Generate ensemble predictions for many matches in one vectorized pass
+
+    Responds with JSON, MessagePack, or an Arrow IPC stream with one row per
+    match; prediction columns stay as arrays end to end in every format.
+    """
+    media_type = negotiate(accept, (JSON, MSGPACK, ARROW))
+    try:
+        columns = with_team_state_columns(
+            {name: values for name, values in batch if values is not None}
+        )
+        prediction = await executor.run(tasks.predict_batch, columns, tier)
+        match_ids = [
+            f"{home}_vs_{away}"
+            for home, away in zip(batch.home_team_id, batch.away_team_id)
+        ]
         
-        return {
+        content = {
             "success": True,
-            "match_id": f"{match.home_team_id}_vs_{match.away_team_id}",
-            "predictions": {
-                "probabilities": prediction,
-                "scorelines": scorelines,
-                "goal_markets": total_goals_probs,
-            }
+            "count": len(batch.home_team_id),
+            "match_ids": match_ids,
+            "predictions": prediction,
         }
+        return encode(content, media_type, columns={"match_id": match_ids, **prediction})
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Prediction failed")
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Batch prediction failed")
 
-@router.post("/analyze")
-async def analyze_match(match: MatchInput):
-    """Detailed match analysis"""
+class LeagueSimulationInput(BaseModel):
+    table: List[TableRow]
+    fixtures: List[MatchInput]
+    n_simulations: int = Field(10000, ge=1, le=1_000_000)
+    seed: Optional[int] = None
+    relegation_places: int = 3
+    top_places: int = 4
+
+    @model_validator(mode="after")
+    def check_fixture_teams(self):
+        team_ids = {row.team_id for row in self.table}
+        for fixture in self.fixtures:
+            if fixture.home_team_id not in team_ids or fixture.away_team_id not in team_ids:
+                raise ValueError(
+                    f"Fixture {fixture.home_team_id}_vs_{fixture.away_team_id} references a team not in the table"
+                )
+        return self
+
+class RequestDrivenStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body generator reads the request stream itself
+
+    The stock response listens for client disconnects by calling receive()
+    concurrently, which would steal request body chunks from the generator.
+    Here the generator owns receive() and sees disconnects through it.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def ndjson_lines(request: Request, max_line_bytes: int):
+    """Yield (line_number, line_bytes_or_None) without holding more than one line
+
+    Oversized lines are dropped and yielded as None so the caller can report them.
+    """
+    buffer = b""
+    line_number = 0
+    oversized = False
+    async for data in request.stream():
+        buffer += data
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if oversized or len(line) > max_line_bytes:
+                oversized = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            buffer = b""
+            oversized = True
+    if oversized:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, buffer
+
+async def run_stream_chunk(chunk: list) -> list:
+    """Score one chunk of (line_number, MatchInput) through the engine
+
+    Precomputed fixtures are fetched in one MGET; only the rest are scored.
+    """
+    matches = [with_team_state(match.dict()) for _, match in chunk]
+    precomputed = await precomputed_predictions.get_many(matches)
+    missing = [i for i, value in enumerate(precomputed) if value is None]
+    payloads = [json.loads(value)["predictions"] if value is not None else None for value in precomputed]
+    while missing:
+        try:
+            computed = await executor.run(tasks.predict_full_batch, [matches[i] for i in missing])
+            for i, payload in zip(missing, computed):
+                payloads[i] = payload
+            break
+        except ExecutorSaturated as e:
+            # A long-lived stream waits for capacity rather than failing
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            logger.error(f"Stream chunk error: {str(e)}")
+            return [
+                {"line": line_number, "success": False, "error": "Prediction failed"}
+                for line_number, _ in chunk
+            ]
+
+    return [
+        {
+            "line": line_number,
+            "success": True,
+            "match_id": f"{match.home_team_id}_vs_{match.away_team_id}",
+            "predictions": payload,
+        }
+        for (line_number, match), payload in zip(chunk, payloads)
+    ]
+
+@router.post("/predict/stream")
+async def predict_stream(request: Request):
+    """Stream predictions for newline-delimited MatchInput records
+
+    Input is read and scored in chunks of STREAM_CHUNK_SIZE records, so memory
+    stays flat however long the stream is. Each output line echoes its input
+    line number; invalid records produce an inline error and the stream goes on.
+    """
+    chunk_size = settings.STREAM_CHUNK_SIZE
+
+    async def results():
+        chunk = []
+        async for line_number, line in ndjson_lines(request, settings.STREAM_MAX_LINE_BYTES):
+            if line is None:
+                error = {"line": line_number, "success": False, "error": "Record too large"}
+                yield dumps_json(error) + b"\n"
+                continue
+            try:
+                chunk.append((line_number, MatchInput.model_validate_json(line)))
+            except ValidationError as e:
+                # e.json() serializes what errors() leaves raw (an unparsable line's bytes)
+                details = json.loads(e.json(include_url=False))
+                error = {"line": line_number, "success": False, "error": details}
+                yield dumps_json(error) + b"\n"
+                continue
+
+            if len(chunk) >= chunk_size:
+                for record in await run_stream_chunk(chunk):
+                    yield dumps_json(record) + b"\n"
+                chunk = []
+
+        if chunk:
+            for record in await run_stream_chunk(chunk):
+                yield dumps_json(record) + b"\n"
+
+    return RequestDrivenStreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.post("/simulate/league")
+async def simulate_league(simulation: LeagueSimulationInput):
+    """Monte Carlo projection of the final table from the remaining fixtures"""
     try:
-        prediction = engine.predict_match(match.dict())
+        result = await executor.run(
+            tasks.simulate_league,
+            [row.dict() for row in simulation.table],
+            [with_team_state(fixture.dict()) for fixture in simulation.fixtures],
+            {
+                "n_simulations": simulation.n_simulations,
+                "seed": simulation.seed,
+                "n_workers": settings.SIMULATION_WORKERS,
+                "relegation_places": simulation.relegation_places,
+                "top_places": simulation.top_places,
+            },
+        )
         
         return {
             "success": True,
-            "analysis": {
+            "n_simulations": result["n_simulations"],
+            "teams": [
+                {
+                    "team_id": team_id,
+                    "title": float(result["title"][i]),
+                    "top": float(result["top"][i]),
+                    "relegation": float(result["relegation"][i]),
+                    "expected_position": float(result["expected_position"][i]),
+                    "expected_points": float(result["expected_points"][i]),
+                    "position_probabilities": result["position_probabilities"][i].tolist(),
+                }
+                for i, team_id in enumerate(result["team_ids"])
+            ],
+        }
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
+    except Exception as e:
+        logger.error(f"Simulation error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Simulation failed")
+
+@router.post("/analyze")
+async def analyze_match(
+    match: MatchInput,
+    sensitivity: bool = False,
+    tier: Tier = "full",
+    profile_token: Optional[str] = Header(None, alias=PROFILE_HEADER),
+):
+    """Detailed match analysis
+
+    With sensitivity=true the analysis also ranks which inputs move the
+    probabilities most, from one batched what-if pass over perturbed inputs.
+    """
+    try:
+        trigger = profiler.trigger(profile_token)
+        profile_ids = []
+        match_data = with_team_state(match.dict())
+        home_form = match.home_form if match.home_form is not None else team_state.form_string(match.home_team_id)
+        away_form = match.away_form if match.away_form is not None else team_state.form_string(match.away_team_id)
+        
+        async def compute():
+            if trigger is not None:
+                prediction, profile_id = await profiler.run(executor, "/analyze", trigger, tasks.predict_match, match_data)
+                profile_ids.append(profile_id)
+            else:
+                prediction = await executor.run(tasks.predict_match, match_data)
+            
+            analysis = {
                 "predicted_outcome": max(prediction['home_win'], prediction['draw'], prediction['away_win']),
                 "confidence_level": prediction['confidence'],
                 "model_agreement": prediction['model_agreement'],
                 "key_factors": [
-                    f"Form difference: {match.home_form} vs {match.away_form}",
+                    f"Form difference: {home_form or 'default'} vs {away_form or 'default'}",
                     f"Expected goals: {match.home_xg} vs {match.away_xg}",
                     f"Home advantage considered" if match.is_home_advantage else "No home advantage",
                 ]
             }
-        }
+            if sensitivity and trigger is not None:
+                analysis["sensitivity"], profile_id = await profiler.run(
+                    executor, "/analyze", trigger, tasks.sensitivity, match_data, tier
+                )
+                profile_ids.append(profile_id)
+            elif sensitivity:
+                analysis["sensitivity"] = await executor.run(tasks.sensitivity, match_data, tier)
+            return {
+                "success": True,
+                "analysis": analysis,
+            }
+        
+        if trigger is not None:
+            response = JSONResponse(await compute())
+            response.headers["X-Profile-Id"] = ",".join(profile_ids)
+            return response
+        
+        namespace = f"analyze_sensitivity_{tier}" if sensitivity else "analyze"
+        return await prediction_cache.get_or_compute(
+            prediction_cache.key(namespace, match_data), compute
+        )
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail="Analysis failed")
 
-import numpy as np
+async def precompute_fixtures(fixtures: List[MatchInput]) -> dict:
+    """Score fixtures in one batch and publish their /predict payloads as a new version"""
+    matches = [with_team_state(fixture.dict()) for fixture in fixtures]
+    payloads = await executor.run(tasks.predict_full_batch, matches)
+    entries = [
+        (
+            match_data,
+            {
+                "success": True,
+                "match_id": f"{fixture.home_team_id}_vs_{fixture.away_team_id}",
+                "predictions": payload,
+            },
+        )
+        for fixture, match_data, payload in zip(fixtures, matches, payloads)
+    ]
+    version = await precomputed_predictions.publish(entries)
+    return {"version": version, "matches": len(entries)}
+
+@router.post("/precompute")
+async def precompute(fixtures: List[MatchInput]):
+    """Precompute full predictions for upcoming fixtures so /predict serves them with one lookup"""
+    try:
+        return {
+            "success": True,
+            **await precompute_fixtures(fixtures),
+        }
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
+    except Exception as e:
+        logger.error(f"Precompute error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Precompute failed")
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Prediction cache hit/miss counters"""
+    return {
+        "success": True,
+        "cache": prediction_cache.stats(),
+        "precomputed": precomputed_predictions.stats(),
+        "redis_breaker": breaker.stats(),
+    }
+
+@router.get("/executor/stats")
+async def executor_stats():
+    """Engine execution backend queue and wait-time metrics"""
+    return {
+        "success": True,
+        "executor": executor.stats(),
+        "micro_batch": {"enabled": settings.MICRO_BATCH_ENABLED, **full_batcher.stats()},
+    }
+
+@router.post("/results")
+async def ingest_results(results: ResultsInput):
+    """Update server-side team form, momentum and Elo from finished matches"""
+    try:
+        await asyncio.to_thread(team_state.record, [
+            (result.home_team_id, result.away_team_id, result.home_goals, result.away_goals)
+            for result in results.results
+        ])
+        
+        return {
+            "success": True,
+            "ingested": len(results.results),
+            "teams_tracked": len(team_state),
+        }
+    except Exception as e:
+        logger.error(f"Result ingestion error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Result ingestion failed")
+
+@router.get("/teams/{team_id}/state")
+async def get_team_state(team_id: int):
+    """Tracked form, momentum and Elo rating for one team"""
+    state = team_state.state(team_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Team not tracked")
+    return {
+        "success": True,
+        "state": state,
+    }
+
+@router.post("/inplay/{match_id}/start")
+async def start_inplay(match_id: str, match: MatchInput):
+    """Begin live tracking of a match from its pre-match inputs"""
+    try:
+        prematch = await executor.run(tasks.inplay_prematch, with_team_state(match.dict()))
+        live = InPlayMatch(match_id, **prematch)
+        live_matches[match_id] = live
+        await inplay_hub.save_match(match_id, live.to_dict())
+        
+        state = live.update(0, 0, 0)
+        await inplay_hub.publish(match_id, state)
+        return {"success": True, "state": state}
+    except ExecutorSaturated as e:
+        raise saturated_response(e)
+    except Exception as e:
+        logger.error(f"In-play start error: {str(e)}")
+        raise HTTPException(status_code=500, detail="In-play start failed")
+
+@router.post("/inplay/{match_id}/event")
+async def inplay_event(match_id: str, event: InPlayEvent):
+    """Recompute a live match for a new minute/score and push it to every subscriber"""
+    live = live_matches.get(match_id)
+    if live is None:
+        stored = await inplay_hub.load_match(match_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Match not live")
+        live = live_matches[match_id] = InPlayMatch.from_dict(stored)
+    try:
+        state = live.update(event.minute, event.home_goals, event.away_goals)
+        await inplay_hub.publish(match_id, dict(state, final=event.final))
+        if event.final:
+            live_matches.pop(match_id, None)
+        return {"success": True, "state": state}
+    except Exception as e:
+        logger.error(f"In-play update error: {str(e)}")
+        raise HTTPException(status_code=500, detail="In-play update failed")
+
+@router.get("/inplay/stats")
+async def inplay_stats():
+    """Live match fan-out counters"""
+    return {
+        "success": True,
+        "live_matches": len(live_matches),
+        "hub": inplay_hub.stats(),
+    }
+
+@router.websocket("/inplay/{match_id}/ws")
+async def inplay_socket(websocket: WebSocket, match_id: str):
+    """Push every update of a live match, starting with its latest state"""
+    await websocket.accept()
+    queue = inplay_hub.subscribe(match_id)
+    
+    async def send_updates():
+        latest = await inplay_hub.latest(match_id)
+        if latest is not None:
+            await websocket.send_text(latest)
+        while True:
+            await websocket.send_text(await queue.get())
+    
+    async def wait_for_disconnect():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    
+    # Whichever ends first (client gone, or a failed send) closes the other
+    workers = [asyncio.create_task(send_updates()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(workers, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        inplay_hub.unsubscribe(match_id, queue)
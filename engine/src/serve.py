@@ -0,0 +1,281 @@
+"""
+Multi-worker serving with shared read-only state
+
+    python -m src.serve --workers 4 --port 8000
+
+The master imports the app once (engine, fitted parameters, ensemble config),
+maps the statistics store, warms the engine up and freezes the heap with
+gc.freeze() before binding the socket and forking. Workers inherit all of
+that copy-on-write, so read-only state is resident once however many workers
+run. Each worker still connects to Redis and loads its own mutable team state
+in the app lifespan.
+
+Signals to the master:
+    SIGHUP           reload parameters in the master, then replace workers one
+                     at a time, each only after its successor reports ready
+    SIGTERM, SIGINT  stop every worker gracefully, then exit
+
+A worker that dies is replaced after a backoff that doubles with each
+recent crash (WORKER_RESTART_BACKOFF up to WORKER_RESTART_MAX_BACKOFF). A
+slot that crashes WORKER_CRASH_LIMIT times within WORKER_CRASH_WINDOW
+seconds is left empty, and the master exits once no worker is left.
+Workers report health through status files in WORKER_STATUS_DIR, served by
+/health/workers.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+
+from src.lib import workers
+from src.lib.config import settings
+
+logger = logging.getLogger("src.serve")
+
+POLL_INTERVAL = 0.2
+
+
+def preload():
+    """Import the app and load every read-only structure workers will share"""
+    from src.features.stats_store import stats_store
+    from src.main import app
+    from src.models import tasks
+
+    stats_store.load(settings.STATS_STORE_PATH)
+    tasks.prewarm()
+    freeze()
+    return app
+
+
+def reload_parameters():
+    """Re-read fitted parameters and statistics in the master for the next worker generation"""
+    from src.features.stats_store import stats_store
+    from src.models import tasks
+
+    tasks.engine.load_dixon_coles(settings.DIXON_COLES_PATH, settings.DIXON_COLES_WEIGHT)
+    tasks.engine.load_ensemble_config(settings.ENSEMBLE_CONFIG_PATH)
+    stats_store.load(settings.STATS_STORE_PATH)
+    tasks.prewarm()
+    freeze()
+
+
+def freeze():
+    # Move everything allocated so far out of the collector's reach so its
+    # passes never write to (and so un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+
+def describe_exit(status: int) -> str:
+    """waitpid status as 'exit code N' or 'signal NAME'"""
+    code = os.waitstatus_to_exitcode(status)
+    if code >= 0:
+        return f"exit code {code}"
+    try:
+        return f"signal {signal.Signals(-code).name}"
+    except ValueError:
+        return f"signal {-code}"
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Pre-forks uvicorn workers on one shared listening socket and keeps them running"""
+
+    def __init__(self, app, sock: socket.socket, n_workers: int, log_level: str = "info"):
+        self.app = app
+        self.sock = sock
+        self.n_workers = n_workers
+        self.log_level = log_level
+        self.generation = 0
+        self.children = {}  # pid -> worker index
+        self.crashes = {}  # worker index -> recent crash times
+        self.restarts = {}  # worker index -> when to respawn it
+        self.reload_requested = False
+        self.stopping = False
+
+    def spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            return pid
+
+        # Worker: let uvicorn install its own signal handlers
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        code = 0
+        try:
+            import uvicorn
+
+            workers.set_identity(index, self.generation)
+            config = uvicorn.Config(self.app, lifespan="on", log_level=self.log_level)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception(f"Worker {index} crashed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def wait_ready(self, pid: int, timeout: float) -> bool:
+        """Wait until the worker has finished its lifespan startup"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = workers.read_status(settings.WORKER_STATUS_DIR, pid)
+            if status is not None and status.get("ready"):
+                return True
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                self.children.pop(pid, None)
+                return False
+            time.sleep(POLL_INTERVAL)
+        return False
+
+    def stop(self, pid: int, timeout: float):
+        """SIGTERM (uvicorn drains in-flight requests), SIGKILL after timeout"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    break
+            except ChildProcessError:
+                break
+            time.sleep(POLL_INTERVAL)
+        else:
+            logger.warning(f"Worker {pid} did not stop in {timeout}s, killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+        workers.remove_status(settings.WORKER_STATUS_DIR, pid)
+
+    def rolling_reload(self):
+        """Replace every worker with one forked from freshly reloaded parameters"""
+        try:
+            reload_parameters()
+        except Exception as e:
+            logger.error(f"Parameter reload failed, keeping current workers: {e}")
+            return
+        self.generation += 1
+        logger.info(f"🔄 Rolling reload to generation {self.generation}")
+        for pid, index in list(self.children.items()):
+            successor = self.spawn(index)
+            if not self.wait_ready(successor, settings.WORKER_READY_TIMEOUT):
+                logger.error(f"Worker {index} of generation {self.generation} never became ready; stopping the reload")
+                if successor in self.children:
+                    self.stop(successor, settings.WORKER_STOP_TIMEOUT)
+                return
+            self.stop(pid, settings.WORKER_STOP_TIMEOUT)
+        logger.info(f"✅ Generation {self.generation} serving on {len(self.children)} workers")
+
+    def reap(self):
+        """Replace workers that exited on their own"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index = self.children.pop(pid, None)
+            workers.remove_status(settings.WORKER_STATUS_DIR, pid)
+            if index is not None and not self.stopping:
+                self.schedule_restart(index, pid, status)
+
+    def schedule_restart(self, index: int, pid: int, status: int):
+        """Back off exponentially per slot, and give up on one that keeps crashing"""
+        now = time.monotonic()
+        crashes = self.crashes.setdefault(index, deque())
+        crashes.append(now)
+        while crashes[0] <= now - settings.WORKER_CRASH_WINDOW:
+            crashes.popleft()
+
+        if len(crashes) >= settings.WORKER_CRASH_LIMIT:
+            logger.error(
+                f"Worker {index} (pid {pid}) exited with {describe_exit(status)}; "
+                f"{len(crashes)} crashes in {settings.WORKER_CRASH_WINDOW:g}s, not restarting it"
+            )
+            return
+        delay = min(
+            settings.WORKER_RESTART_MAX_BACKOFF,
+            settings.WORKER_RESTART_BACKOFF * 2 ** (len(crashes) - 1),
+        )
+        logger.warning(f"Worker {index} (pid {pid}) exited with {describe_exit(status)}, restarting in {delay:g}s")
+        self.restarts[index] = now + delay
+
+    def respawn_due(self):
+        now = time.monotonic()
+        for index, due in list(self.restarts.items()):
+            if due <= now:
+                del self.restarts[index]
+                self.spawn(index)
+
+    def run(self) -> int:
+        def request_reload(signum, frame):
+            self.reload_requested = True
+
+        def request_stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGHUP, request_reload)
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        for index in range(self.n_workers):
+            self.spawn(index)
+        logger.info(f"✅ Serving on {self.n_workers} workers (master pid {os.getpid()})")
+
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_reload()
+            self.reap()
+            self.respawn_due()
+            if not self.children and not self.restarts:
+                logger.error("🛑 Every worker gave up after repeated crashes, exiting")
+                return 1
+            time.sleep(POLL_INTERVAL)
+
+        logger.info("🛑 Stopping workers")
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.children):
+            self.stop(pid, settings.WORKER_STOP_TIMEOUT)
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the engine from pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--log-level", default=settings.LOG_LEVEL)
+    args = parser.parse_args()
+
+    os.makedirs(settings.WORKER_STATUS_DIR, exist_ok=True)
+    for name in os.listdir(settings.WORKER_STATUS_DIR):
+        if name.startswith("worker-"):
+            os.remove(os.path.join(settings.WORKER_STATUS_DIR, name))
+
+    app = preload()
+    sock = bind(args.host, args.port)
+    code = Supervisor(app, sock, args.workers, args.log_level).run()
+    sock.close()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from src.features.engineering import FEATURE_NAMES, FeatureEngineer
+from src.models.ensemble import PredictionEngine
+
+TEAM_FIELDS = (
+    "points_last_5", "points_last_10", "points_last_20", "xg_avg", "clean_sheets",
+    "goals_conceded", "matches_played", "days_since_last_match", "matches_in_14_days",
+    "squad_depth", "key_players_out",
+)
+
+OUTCOMES = ("home_win", "draw", "away_win", "model_agreement")
+
+# Each score matrix is truncated where the tail mass drops below
+# TAIL_PROBABILITY for its largest lambda, so a batch may keep a few more
+# goals than a single match does
+TRUNCATION_TOLERANCE = 1e-5
+
+
+def team(seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "id": seed,
+        "recent_results": list(rng.choice(["W", "D", "L"], 5)),
+        "points_last_5": int(rng.integers(0, 16)),
+        "points_last_10": int(rng.integers(0, 31)),
+        "points_last_20": int(rng.integers(0, 61)),
+        "home_record": {"wins": int(rng.integers(0, 10)), "played": 12},
+        "xg_avg": float(rng.uniform(0.5, 2.5)),
+        "clean_sheets": int(rng.integers(0, 10)),
+        "goals_conceded": int(rng.integers(5, 30)),
+        "matches_played": int(rng.integers(5, 38)),
+        "days_since_last_match": int(rng.integers(2, 10)),
+        "matches_in_14_days": int(rng.integers(1, 5)),
+        "squad_depth": int(rng.integers(16, 30)),
+        "key_players_out": int(rng.integers(0, 4)),
+    }
+
+
+def feature_matches(size: int = 12) -> list:
+    stages = ("early", "mid", "late")
+    return [
+        {
+            "home_team": team(2 * i + 1),
+            "away_team": team(2 * i + 2),
+            "competition_stage": stages[i % 3],
+            "weather": {"wind_speed": 3 * i, "rain_probability": i / size, "temperature": 5 + i},
+        }
+        for i in range(size)
+    ]
+
+
+def batch_columns(matches: list) -> dict:
+    """The flat column form of per-match dicts"""
+    columns = {}
+    for side in ("home", "away"):
+        teams = [match[f"{side}_team"] for match in matches]
+        columns[f"{side}_recent_results"] = ["".join(t["recent_results"]) for t in teams]
+        for field in TEAM_FIELDS:
+            columns[f"{side}_{field}"] = [t[field] for t in teams]
+    columns["home_record_wins"] = [match["home_team"]["home_record"]["wins"] for match in matches]
+    columns["home_record_played"] = [match["home_team"]["home_record"]["played"] for match in matches]
+    columns["competition_stage"] = [match["competition_stage"] for match in matches]
+    for field in ("wind_speed", "rain_probability", "temperature"):
+        columns[f"weather_{field}"] = [match["weather"][field] for match in matches]
+    return columns
+
+
+def engine_matches(size: int = 40) -> list:
+    rng = np.random.default_rng(7)
+    forms = ["WWW", "WDL", "LLD", "WWDWW", "DDD", "LWLWL"]
+    return [
+        {
+            "home_team_id": 1,
+            "away_team_id": 2,
+            "home_form": forms[rng.integers(len(forms))],
+            "away_form": forms[rng.integers(len(forms))],
+            "home_xg": float(rng.uniform(0.3, 3.5)),
+            "away_xg": float(rng.uniform(0.3, 3.0)),
+            "home_possession": 55,
+            "away_possession": 45,
+        }
+        for _ in range(size)
+    ]
+
+
+def test_feature_batch_matches_scalar():
+    matches = feature_matches()
+    batch = FeatureEngineer.engineer_match_features_batch(batch_columns(matches))
+
+    assert batch.shape == (len(matches), len(FEATURE_NAMES))
+    for row, match in zip(batch, matches):
+        scalar = FeatureEngineer.engineer_match_features(match, {})
+        np.testing.assert_allclose(row, [scalar[name] for name in FEATURE_NAMES], rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("tier", ["full", "fast"])
+def test_predict_batch_matches_predict_match(tier):
+    engine = PredictionEngine()
+    matches = engine_matches()
+    batch = engine.predict_batch(matches, tier)
+
+    for i, match in enumerate(matches):
+        if tier == "full":
+            single = engine.predict_match(match)
+        else:
+            single = engine.predict_tiered(match, tier)["probabilities"]
+        for outcome in OUTCOMES:
+            assert batch[outcome][i] == pytest.approx(single[outcome], abs=TRUNCATION_TOLERANCE)
+        assert batch["confidence"][i] == single["confidence"]
+
+
+def test_predict_batch_accepts_columns():
+    engine = PredictionEngine()
+    matches = engine_matches(10)
+    columns = {name: [match[name] for match in matches] for name in matches[0]}
+
+    rows = engine.predict_batch(matches)
+    from_columns = engine.predict_batch(columns)
+    for outcome in OUTCOMES:
+        np.testing.assert_allclose(from_columns[outcome], rows[outcome])
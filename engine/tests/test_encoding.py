@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.lib.encoding import ARROW, JSON, MSGPACK, available_media_types, dumps_json, negotiate
+
+needs_msgpack = pytest.mark.skipif(MSGPACK not in available_media_types(), reason="msgpack not installed")
+
+
+@pytest.mark.parametrize("accept", [None, "", "*/*", "application/*", "application/json"])
+def test_defaults_to_json(accept):
+    assert negotiate(accept) == JSON
+
+
+@needs_msgpack
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/msgpack;q=0.4, application/json;q=0.9", JSON),
+        ("application/msgpack;q=0.9, */*;q=0.1", MSGPACK),
+        # Equal quality goes to the first listed
+        ("application/msgpack, application/json", MSGPACK),
+        ("application/json, application/msgpack", JSON),
+        ("text/html, application/msgpack;q=0.2", MSGPACK),
+    ],
+)
+def test_honours_q_values(accept, expected):
+    assert negotiate(accept) == expected
+
+
+@pytest.mark.parametrize(
+    "accept",
+    [
+        "text/html",
+        "application/json;q=0",
+        "application/json;q=bogus",
+        ARROW,
+    ],
+)
+def test_not_acceptable(accept):
+    with pytest.raises(HTTPException) as raised:
+        negotiate(accept, (JSON, MSGPACK))
+    assert raised.value.status_code == 406
+
+
+def test_dumps_json_handles_numpy():
+    content = {"probabilities": np.array([0.5, 0.25]), "count": np.int64(3), "agreement": np.float32(0.5)}
+
+    assert json.loads(dumps_json(content)) == {"probabilities": [0.5, 0.25], "count": 3, "agreement": 0.5}
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.lib.executor import ExecutorSaturated, PredictionExecutor
+from src.routes import predictions
+
+
+def test_runs_inline_and_counts():
+    executor = PredictionExecutor("inline", max_workers=1, max_queue=0)
+
+    assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+    assert executor.stats()["completed"] == 1
+    assert executor.pending == 0
+
+
+def test_thread_mode_runs_off_the_loop():
+    executor = PredictionExecutor("thread", max_workers=2, max_queue=2)
+    try:
+        assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+    finally:
+        executor.shutdown()
+
+
+def test_rejects_beyond_workers_plus_queue():
+    executor = PredictionExecutor("inline", max_workers=1, max_queue=1, retry_after=3)
+    executor.pending = 2
+
+    with pytest.raises(ExecutorSaturated) as raised:
+        asyncio.run(executor.run(pow, 2, 10))
+
+    assert raised.value.retry_after == 3
+    assert executor.counters["rejected"] == 1
+    assert executor.pending == 2
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        PredictionExecutor("fork", max_workers=1, max_queue=0)
+
+
+def test_saturated_predict_returns_503(monkeypatch):
+    saturated = PredictionExecutor("inline", max_workers=1, max_queue=0, retry_after=2)
+    saturated.pending = 1
+    monkeypatch.setattr(predictions, "executor", saturated)
+
+    app = FastAPI()
+    app.include_router(predictions.router, prefix="/predictions")
+    response = TestClient(app).post(
+        "/predictions/predict?tier=fast",
+        json={"home_team_id": 1, "away_team_id": 2, "home_form": "WWD", "away_form": "LDL"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert saturated.counters["rejected"] == 1
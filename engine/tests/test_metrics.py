@@ -0,0 +1,33 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes.metrics import HTTP_REQUESTS, MetricsMiddleware
+
+items = APIRouter()
+
+
+@items.get("/items/{name}")
+async def get_item(name: str):
+    return {"name": name}
+
+
+def routes_seen(path: str) -> set:
+    app = FastAPI()
+    app.include_router(items, prefix="/store")
+    app.add_middleware(MetricsMiddleware)
+    before = dict(HTTP_REQUESTS._values)
+    TestClient(app).get(path)
+    return {key[1] for key, value in HTTP_REQUESTS._values.items() if value != before.get(key)}
+
+
+def test_labels_use_route_template():
+    assert routes_seen("/store/items/42") == {"/store/items/{name}"}
+
+
+def test_parameter_matching_a_path_segment():
+    # The value equals the literal segment before it; only the parameter is templated
+    assert routes_seen("/store/items/items") == {"/store/items/{name}"}
+
+
+def test_unmatched_paths_share_one_label():
+    assert routes_seen("/nowhere/42") == {"unmatched"}
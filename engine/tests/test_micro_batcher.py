@@ -0,0 +1,58 @@
+import asyncio
+
+from src.lib.micro_batcher import MicroBatcher
+
+
+def recording_batcher(**kwargs):
+    batches = []
+
+    async def run_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    return MicroBatcher(run_batch, **kwargs), batches
+
+
+def test_flushes_when_batch_is_full():
+    # max_wait is long enough that only the size limit can trigger the flushes
+    batcher, batches = recording_batcher(max_batch_size=4, max_wait=60)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+
+    results = asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+    assert results == [i * 10 for i in range(8)]
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert batcher.counters["max_batch_size"] == 4
+
+
+def test_flushes_partial_batch_after_max_wait():
+    batcher, batches = recording_batcher(max_batch_size=64, max_wait=0.01)
+
+    async def main():
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        return results, asyncio.get_running_loop().time() - started
+
+    results, elapsed = asyncio.run(main())
+
+    assert results == [0, 10, 20]
+    assert batches == [[0, 1, 2]]
+    assert elapsed >= 0.01
+    assert batcher.counters["batches"] == 1
+
+
+def test_batch_failure_reaches_every_caller():
+    async def run_batch(items):
+        raise RuntimeError("batch failed")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait=60)
+
+    async def main():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert batcher.counters["failed"] == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.lib.prediction_cache import PredictionCache, payload_digest
+
+
+def test_key_is_canonical_and_versioned():
+    cache = PredictionCache(ttl=60, model_version="v1")
+    key = cache.key("predict", {"b": 1, "a": 2})
+
+    assert key == cache.key("predict", {"a": 2, "b": 1})
+    assert key == f"prediction:predict:v1:{payload_digest({'a': 2, 'b': 1})}"
+    cache.set_model_version("v2")
+    assert cache.key("predict", {"a": 2, "b": 1}) != key
+
+
+def test_concurrent_misses_share_one_computation():
+    # Without Redis every lookup misses, so only single-flight prevents recomputing
+    cache = PredictionCache(ttl=60, model_version="v1")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"home_win": 0.5}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert results == [{"home_win": 0.5}] * 5
+    assert len(calls) == 1
+    assert cache.counters["misses"] == 1
+    assert cache.counters["coalesced"] == 4
+    assert cache.stats()["inflight"] == 0
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    cache = PredictionCache(ttl=60, model_version="v1")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("model failed")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_compute("key", compute) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        asyncio.run(cache.get_or_compute("key", compute))
+    assert len(calls) == 2
+
+
+def test_disabled_cache_always_computes():
+    cache = PredictionCache(ttl=60, model_version="v1", enabled=False)
+
+    async def compute():
+        return {"home_win": 0.5}
+
+    assert asyncio.run(cache.get_or_compute("key", compute)) == {"home_win": 0.5}
+    assert cache.counters["misses"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    cache = PredictionCache(ttl=60, model_version="v1")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"home_win": 0.5}
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == {"home_win": 0.5}
+    assert len(calls) == 1
+    assert cache.counters["coalesced"] == 1
+    assert cache.stats()["inflight"] == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from src.models.score_matrix import TAIL_PROBABILITY, ScoreMatrix, exact_poisson_pmf
+
+HOME = np.array([0.4, 1.1, 1.6, 2.9])
+AWAY = np.array([0.3, 0.9, 1.8, 2.2])
+RHO = -0.13
+
+
+@pytest.mark.parametrize("rho", [0.0, RHO])
+def test_outcomes_sum_to_one(rho):
+    outcomes = ScoreMatrix(HOME, AWAY, rho=rho).outcome_probabilities()
+    total = outcomes["home_win"] + outcomes["draw"] + outcomes["away_win"]
+    np.testing.assert_allclose(total, 1.0, atol=2 * TAIL_PROBABILITY)
+
+
+@pytest.mark.parametrize("rho", [0.0, RHO])
+def test_goal_distributions_sum_to_one(rho):
+    matrix = ScoreMatrix(HOME, AWAY, rho=rho)
+    np.testing.assert_allclose(matrix.total_goals().sum(axis=1), 1.0, atol=2 * TAIL_PROBABILITY)
+    np.testing.assert_allclose(matrix.goal_difference().sum(axis=1), 1.0, atol=2 * TAIL_PROBABILITY)
+
+
+def test_two_way_markets_are_complementary():
+    for markets in ScoreMatrix(HOME, AWAY, rho=RHO).goal_markets():
+        assert markets["btts_yes"] + markets["btts_no"] == pytest.approx(1.0)
+        for line in (0, 1, 2, 3, 4):
+            assert markets[f"over_{line}"] + markets[f"under_{line}"] == pytest.approx(1.0)
+            assert 0.0 <= markets[f"over_{line}"] <= 1.0
+        assert markets["over_0"] >= markets["over_1"] >= markets["over_2"]
+
+
+def test_dixon_coles_tau_correction():
+    independent = ScoreMatrix(HOME, AWAY, max_goals=10)
+    corrected = ScoreMatrix(HOME, AWAY, max_goals=10, rho=RHO)
+    ratio = corrected.matrix / independent.matrix
+
+    np.testing.assert_allclose(ratio[:, 0, 0], 1 - HOME * AWAY * RHO)
+    np.testing.assert_allclose(ratio[:, 0, 1], 1 + HOME * RHO)
+    np.testing.assert_allclose(ratio[:, 1, 0], 1 + AWAY * RHO)
+    np.testing.assert_allclose(ratio[:, 1, 1], 1 - RHO)
+
+    # Every other scoreline is untouched and the total mass is preserved
+    ratio[:, :2, :2] = 1.0
+    np.testing.assert_allclose(ratio, 1.0)
+    np.testing.assert_allclose(corrected.matrix.sum(axis=(1, 2)), independent.matrix.sum(axis=(1, 2)))
+
+
+def test_dixon_coles_btts_uses_corrected_matrix():
+    corrected = ScoreMatrix(HOME, AWAY, max_goals=10, rho=RHO)
+    np.testing.assert_allclose(corrected.both_teams_to_score(), corrected.matrix[:, 1:, 1:].sum(axis=(1, 2)))
+
+
+def test_marginals_are_poisson():
+    matrix = ScoreMatrix(HOME, AWAY, max_goals=10)
+    away_mass = exact_poisson_pmf(AWAY, 10).sum(axis=1)[:, None]
+    np.testing.assert_allclose(matrix.matrix.sum(axis=2), exact_poisson_pmf(HOME, 10) * away_mass)
@@ -0,0 +1,76 @@
+import signal
+
+import pytest
+
+from src import serve
+from src.lib.config import settings
+from src.serve import Supervisor, describe_exit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(serve.time, "monotonic", clock)
+    monkeypatch.setattr(settings, "WORKER_RESTART_BACKOFF", 1.0)
+    monkeypatch.setattr(settings, "WORKER_RESTART_MAX_BACKOFF", 4.0)
+    monkeypatch.setattr(settings, "WORKER_CRASH_LIMIT", 5)
+    monkeypatch.setattr(settings, "WORKER_CRASH_WINDOW", 60.0)
+
+    supervisor = Supervisor(app=None, sock=None, n_workers=1)
+    supervisor.clock = clock
+    supervisor.spawned = []
+    monkeypatch.setattr(supervisor, "spawn", supervisor.spawned.append)
+    return supervisor
+
+
+def test_describe_exit():
+    assert describe_exit(3 << 8) == "exit code 3"
+    assert describe_exit(signal.SIGKILL) == "signal SIGKILL"
+
+
+def test_restart_backoff_doubles_up_to_the_cap(supervisor):
+    delays = []
+    for pid in range(4):
+        supervisor.schedule_restart(0, pid, 1 << 8)
+        delays.append(supervisor.restarts[0] - supervisor.clock.now)
+
+    assert delays == [1.0, 2.0, 4.0, 4.0]
+
+
+def test_respawns_only_once_the_backoff_has_passed(supervisor):
+    supervisor.schedule_restart(0, 100, 1 << 8)
+
+    supervisor.respawn_due()
+    assert supervisor.spawned == []
+
+    supervisor.clock.now += 1.0
+    supervisor.respawn_due()
+    assert supervisor.spawned == [0]
+    assert supervisor.restarts == {}
+
+
+def test_gives_up_after_crash_limit_within_window(supervisor):
+    for pid in range(4):
+        supervisor.schedule_restart(0, pid, signal.SIGSEGV)
+        supervisor.clock.now += 5.0
+    supervisor.restarts.clear()
+
+    supervisor.schedule_restart(0, 4, signal.SIGSEGV)
+    assert 0 not in supervisor.restarts
+
+
+def test_crashes_outside_the_window_are_forgotten(supervisor):
+    for pid in range(4):
+        supervisor.schedule_restart(0, pid, 1 << 8)
+    supervisor.clock.now += 61.0
+
+    supervisor.schedule_restart(0, 4, 1 << 8)
+    assert supervisor.restarts[0] - supervisor.clock.now == 1.0
@@ -0,0 +1,21 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes import predictions
+
+
+def test_invalid_records_stream_inline_errors():
+    app = FastAPI()
+    app.include_router(predictions.router, prefix="/predictions")
+    body = b'{"home_team_id": "x", "away_team_id": 2}\nnot json\n'
+
+    response = TestClient(app).post("/predictions/predict/stream", content=body)
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["line"] for line in lines] == [1, 2]
+    assert not any(line["success"] for line in lines)
+    assert lines[0]["error"][0]["loc"] == ["home_team_id"]
+    assert lines[1]["error"][0]["type"] == "json_invalid"
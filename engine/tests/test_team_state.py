@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+
+from src.models.team_state import FORM_WINDOW, TeamStateStore
+
+RESULTS = [
+    (1, 2, 2, 0),
+    (3, 1, 1, 1),
+    (2, 3, 0, 3),
+    (1, 3, 1, 2),
+    (2, 1, 2, 2),
+    (4, 1, 0, 1),
+    (1, 2, 3, 1),
+]
+
+
+def ingested(results=RESULTS) -> TeamStateStore:
+    store = TeamStateStore(capacity=2)
+    for result in results:
+        store.ingest(*result)
+    return store
+
+
+def assert_same_state(store: TeamStateStore, expected: TeamStateStore):
+    assert len(store) == len(expected)
+    for team_id in (1, 2, 3, 4):
+        assert store.state(team_id) == expected.state(team_id)
+
+
+def test_ingest_tracks_form_and_rating():
+    store = ingested()
+
+    assert len(store) == 4
+    # Team 1 went W D L D W W; only the last FORM_WINDOW count
+    assert store.form_string(1) == "WDLDWW"[-FORM_WINDOW:]
+    state = store.state(1)
+    assert state["played"] == 6
+    assert state["points_last_5"] == 1 + 0 + 1 + 3 + 3
+    assert store.state(4)["elo_rating"] < 1500.0
+    assert store.state(99) is None
+    assert store.form_index(99) is None
+
+
+def test_form_index_batch_matches_scalar():
+    store = ingested()
+    batch = store.form_index_batch([1, 2, 99, 4])
+
+    np.testing.assert_allclose(batch[[0, 1, 3]], [store.form_index(team_id) for team_id in (1, 2, 4)])
+    assert np.isnan(batch[2])
+
+
+def test_record_load_round_trip(tmp_path):
+    path = str(tmp_path / "team_state.npz")
+    writer = TeamStateStore(compact_every=1000)
+    assert not writer.load(path)
+
+    writer.record(RESULTS)
+    assert os.path.exists(writer.log_path)
+
+    reader = TeamStateStore()
+    assert reader.load(path)
+    assert_same_state(reader, ingested())
+    assert reader.revision == writer.revision
+
+
+def test_compaction_round_trip(tmp_path):
+    path = str(tmp_path / "team_state.npz")
+    writer = TeamStateStore(compact_every=3)
+    writer.load(path)
+    for result in RESULTS:
+        writer.record([result])
+
+    assert os.path.exists(path)
+    reader = TeamStateStore()
+    reader.load(path)
+    assert_same_state(reader, ingested())
+
+
+def test_refresh_replays_other_writers(tmp_path):
+    path = str(tmp_path / "team_state.npz")
+    first, second = TeamStateStore(compact_every=4), TeamStateStore(compact_every=4)
+    first.load(path)
+    second.load(path)
+
+    for i, result in enumerate(RESULTS):
+        (first if i % 2 else second).record([result])
+    first.refresh()
+    second.refresh()
+
+    expected = ingested()
+    assert_same_state(first, expected)
+    assert_same_state(second, expected)